@@ -0,0 +1,275 @@
+"""
+Нагрузочный прогон по настоящим маршрутам приложения.
+
+    DATABASE_URL=sqlite:///bench.db python benchmarks/loadtest.py
+    DATABASE_URL=sqlite:///bench.db python benchmarks/loadtest.py --requests 500 --threads 4 --json before.json
+    DATABASE_URL=sqlite:///bench.db python benchmarks/loadtest.py --server --compare before.json
+    DATABASE_URL=sqlite:///bench.db python benchmarks/loadtest.py --server --threads 1,8,32 --json sync.json
+    DATABASE_URL=sqlite:///bench.db python benchmarks/loadtest.py --server --threads 1,8,32 --async-views --compare sync.json
+
+База заполняется через benchmarks/seed.py. По умолчанию запросы идут через
+тестовый клиент Flask; с --server поднимается локальный WSGI-сервер werkzeug
+и запросы идут по HTTP. Для каждого сценария: p50/p95/p99, пропускная
+способность и число SQL-запросов на запрос. --threads принимает список
+(1,8,32) — каждый сценарий прогоняется при каждом числе параллельных
+клиентов; --async-views включает ASYNC_VIEWS для сравнения двух режимов.
+"""
+import argparse
+import contextvars
+import http.cookiejar
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import event
+from app import create_app
+from models import db, News, User
+from utils.pagination import encode_cursor
+
+# Создаётся в main(): режим ASYNC_VIEWS задаётся флагом
+app = None
+
+
+PASSWORD = "password"
+
+# (имя, роль, метод, путь, данные формы); {news_id} подставляется случайной новостью
+SCENARIOS = [
+    ("feed", "student", "GET", "/", None),
+    ("feed_page", "student", "GET", "/?after={cursor}", None),
+    ("news_detail", "student", "GET", "/news/{news_id}", None),
+    ("news_comments", "student", "GET", "/news/{news_id}/comments", None),
+    ("profile_student", "student", "GET", "/profile", None),
+    ("profile_teacher", "teacher", "GET", "/profile", None),
+    ("timetable_json", "student", "GET", "/timetable/group/{group_id}/{course}.json", None),
+    ("search", "student", "GET", "/news/search?q={word}", None),
+    ("admin", "admin", "GET", "/admin", None),
+    ("admin_schedule", "admin", "GET", "/admin/schedule", None),
+    ("like", "student", "POST", "/news/like/{news_id}", None),
+    ("comment", "student", "POST", "/news/comment/{news_id}", {"content": "нагрузочный комментарий"}),
+    ("login", None, "POST", "/login", "login"),
+]
+
+ACCOUNTS = {
+    "admin": ("admin@bench.local", "admin"),
+    "teacher": ("teacher1@bench.local", "teacher"),
+    "student": ("student1@bench.local", "student"),
+}
+
+
+class QueryCounter:
+    """
+    Считает SQL-запросы по потокам клиента: один поток — один запрос в работе.
+    Счётчик лежит в ContextVar — запросы ASYNC_VIEWS выполняются в потоке цикла
+    событий, но с копией контекста, и увеличивают тот же счётчик.
+    """
+
+    def __init__(self):
+        self.cell = contextvars.ContextVar("queries")
+
+    def __call__(self, *args):
+        cell = self.cell.get(None)
+        if cell is not None:
+            cell[0] += 1
+
+    def take(self):
+        cell = self.cell.get(None)
+        if cell is None:
+            self.cell.set([0])
+            return 0
+        count, cell[0] = cell[0], 0
+        return count
+
+
+class TestClientDriver:
+    def __init__(self):
+        self.client = app.test_client()
+
+    def request(self, method, path, data=None):
+        response = self.client.open(path, method=method, data=data)
+        response.close()
+        return response.status_code
+
+
+class HttpDriver:
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()), _NoRedirect())
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with self.opener.open(req) as response:
+                response.read()
+                return response.status
+        except urllib.error.HTTPError as error:
+            error.read()
+            return error.code
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    # Редирект — часть ответа маршрута, следующую страницу не запрашиваем
+    def redirect_request(self, *args):
+        return None
+
+
+def login_form(role):
+    email, form_role = ACCOUNTS[role]
+    return {"email": email, "password": PASSWORD, "role": form_role}
+
+
+def percentile(values, p):
+    # Метод ближайшего ранга
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def sample_params(rng):
+    with app.app_context():
+        last_id = db.session.scalar(db.select(db.func.max(News.id))) or 1
+        middle = db.session.get(News, max(1, last_id // 2))
+        student = User.query.filter_by(email=ACCOUNTS["student"][0]).first()
+    cursor = encode_cursor(middle.created_at, middle.id) if middle else ""
+    return lambda: {"news_id": rng.randint(max(1, last_id - 1000), last_id), "cursor": cursor,
+                    # Кириллица в URL: urllib (--server) отправляет строку запроса только в ASCII
+                    "word": urllib.parse.quote(rng.choice(["экзамен", "сессия", "стипендия", "финансы"])),
+                    "group_id": student.group_id, "course": student.course}
+
+
+def run_scenario(name, role, method, path, data, make_driver, params, requests, threads, counter):
+    def worker(count):
+        driver = make_driver()
+        if role:
+            driver.request("POST", "/login", login_form(role))
+        take = counter.take if counter is not None else (lambda: 0)
+        take()
+        samples = []
+        for _ in range(count):
+            form = login_form("student") if data == "login" else data
+            started = time.perf_counter()
+            status = driver.request(method, path.format(**params()), form)
+            samples.append((time.perf_counter() - started, take(), status))
+        return samples
+
+    per_thread = [requests // threads + (1 if i < requests % threads else 0) for i in range(threads)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        samples = [s for chunk in pool.map(worker, per_thread) for s in chunk]
+    wall = time.perf_counter() - started
+
+    latencies = [s[0] * 1000 for s in samples]
+    queries = [s[1] for s in samples]
+    errors = sum(1 for s in samples if s[2] >= 500)
+    return {
+        "scenario": name,
+        "requests": len(samples),
+        "threads": threads,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.fmean(latencies), 2),
+        "throughput_rps": round(len(samples) / wall, 1),
+        # При --server запросы выполняются в потоках сервера — счётчик клиента их не видит
+        "queries_per_request": None if counter is None else round(statistics.fmean(queries), 2),
+        "max_queries": None if counter is None else max(queries),
+        "errors_5xx": errors,
+    }
+
+
+def start_server():
+    import logging
+    from werkzeug.serving import make_server
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def compare(results, path):
+    with open(path) as f:
+        baseline = {(r["scenario"], r["threads"]): r for r in json.load(f)["results"]}
+    print(f"\nСравнение с {path} (p95, мс и rps):")
+    for result in results:
+        before = baseline.get((result["scenario"], result["threads"]))
+        if before:
+            change = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0
+            print(f"  {result['scenario']:<18}{result['threads']:>4}{before['p95_ms']:>10}{result['p95_ms']:>10}"
+                  f"{change:>+9.1f}%{before['throughput_rps']:>10}{result['throughput_rps']:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("scenarios", nargs="*", help="имена сценариев (по умолчанию все)")
+    parser.add_argument("--requests", type=int, default=200, help="запросов на сценарий")
+    parser.add_argument("--threads", default="1", help="параллельных клиентов; список через запятую — по очереди")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--server", action="store_true", help="гонять запросы через локальный WSGI-сервер")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", metavar="PATH", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", metavar="PATH", help="сравнить с сохранённым прогоном")
+    parser.add_argument("--async-views", action="store_true", help="включить ASYNC_VIEWS (асинхронные read-маршруты)")
+    args = parser.parse_args()
+    thread_counts = [int(n) for n in args.threads.split(",")]
+
+    global app
+    app = create_app({"ASYNC_VIEWS": args.async_views})
+
+    selected = [s for s in SCENARIOS if not args.scenarios or s[0] in args.scenarios]
+    with app.app_context():
+        if not db.session.scalar(db.select(db.func.count()).select_from(User)):
+            sys.exit("База пуста — сначала запустите benchmarks/seed.py.")
+        counter = None if args.server else QueryCounter()
+        if counter is not None:
+            event.listen(db.engine, "before_cursor_execute", counter)
+            if args.async_views:
+                # Асинхронный движок заводится лениво, при первом async-запросе
+                async_db = app.extensions["async_db"]
+                async_db._start()
+                event.listen(async_db.engine.sync_engine, "before_cursor_execute", counter)
+        database = str(db.engine.url)
+
+    server = None
+    if args.server:
+        server, base_url = start_server()
+        make_driver = lambda: HttpDriver(base_url)
+    else:
+        make_driver = TestClientDriver
+
+    params = sample_params(random.Random(args.seed))
+    results = []
+    print(f"{'сценарий':<18}{'потоки':>7}{'p50':>9}{'p95':>9}{'p99':>9}{'rps':>9}{'SQL/запр':>10}")
+    for name, role, method, path, data in selected:
+        run_scenario(name, role, method, path, data, make_driver, params, args.warmup, 1, counter)
+        for threads in thread_counts:
+            result = run_scenario(name, role, method, path, data, make_driver, params,
+                                  args.requests, threads, counter)
+            results.append(result)
+            queries = result["queries_per_request"] if result["queries_per_request"] is not None else "-"
+            print(f"{name:<18}{threads:>7}{result['p50_ms']:>9}{result['p95_ms']:>9}{result['p99_ms']:>9}"
+                  f"{result['throughput_rps']:>9}{queries:>10}")
+    if server:
+        server.shutdown()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"database": database, "mode": "server" if args.server else "test_client",
+                       "async_views": args.async_views, "threads": thread_counts,
+                       "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "results": results}, f, indent=2, ensure_ascii=False)
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
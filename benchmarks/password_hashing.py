@@ -0,0 +1,74 @@
+"""
+Сколько входов в секунду выдерживает одно ядро при разных политиках хэширования.
+
+    python benchmarks/password_hashing.py
+    python benchmarks/password_hashing.py --seconds 5 --threads 4 pbkdf2:sha256:600000 scrypt:16384:8:1
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+DEFAULT_POLICIES = [
+    "scrypt",
+    "scrypt:16384:8:1",
+    "pbkdf2:sha256",
+    "pbkdf2:sha256:600000",
+]
+
+
+def measure(policy, seconds, threads):
+    password = "correct horse battery"
+    password_hash = generate_password_hash(password, policy)
+
+    def verify_loop(deadline):
+        done = 0
+        while time.perf_counter() < deadline:
+            check_password_hash(password_hash, password)
+            done += 1
+        return done
+
+    start = time.perf_counter()
+    single = verify_loop(start + seconds)
+    per_core = single / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        done = sum(pool.map(verify_loop, [start + seconds] * threads))
+    pooled = done / (time.perf_counter() - start)
+
+    return {
+        "policy": password_hash.split("$", 1)[0],
+        "ms_per_login": round(1000 / per_core, 2),
+        "logins_per_sec_per_core": round(per_core, 1),
+        "logins_per_sec_pool": round(pooled, 1),
+        "pool_threads": threads,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("policies", nargs="*", default=DEFAULT_POLICIES)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    parser.add_argument("--threads", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--json", metavar="PATH", help="сохранить результаты в JSON")
+    args = parser.parse_args()
+
+    results = []
+    print(f"{'политика':<28}{'мс/вход':>10}{'вход/с/ядро':>14}{'вход/с (пул)':>16}")
+    for policy in args.policies:
+        result = measure(policy, args.seconds, args.threads)
+        results.append(result)
+        print(f"{result['policy']:<28}{result['ms_per_login']:>10}"
+              f"{result['logins_per_sec_per_core']:>14}{result['logins_per_sec_pool']:>16}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
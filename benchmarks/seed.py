@@ -0,0 +1,203 @@
+"""
+Наполнение базы синтетическими данными для нагрузочных замеров.
+
+    DATABASE_URL=sqlite:///bench.db python benchmarks/seed.py --reset --scale small
+    DATABASE_URL=sqlite:///bench.db python benchmarks/seed.py --reset --scale large --comments 2000000
+
+Все пароли — "password". Входы для benchmarks/loadtest.py:
+admin@bench.local, teacher1@bench.local, student1@bench.local.
+Строки вставляются пачками через executemany, без ORM-объектов.
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, time as dtime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert
+from werkzeug.security import generate_password_hash
+from app import create_app
+from models import (db, Group, Subject, User, Schedule, News, Comments,
+                    news_likes, teacher_subjects, recount_news_counters)
+from utils.migrations import upgrade_schema
+from utils.schedule_conflicts import mark_changed
+from utils import search, timetables
+
+# Для наполнения нужна только база
+app = create_app(views=False)
+
+
+SCALES = {
+    "tiny":   dict(users=500, groups=20, subjects=30, news=1_000, comments=5_000, likes=5_000),
+    "small":  dict(users=5_000, groups=100, subjects=80, news=10_000, comments=100_000, likes=100_000),
+    "medium": dict(users=20_000, groups=250, subjects=150, news=50_000, comments=500_000, likes=500_000),
+    "large":  dict(users=50_000, groups=500, subjects=200, news=100_000, comments=1_000_000, likes=1_000_000),
+}
+
+PAIRS = [(dtime(8, 30), dtime(10, 0)), (dtime(10, 10), dtime(11, 40)),
+         (dtime(12, 10), dtime(13, 40)), (dtime(13, 50), dtime(15, 20)),
+         (dtime(15, 30), dtime(17, 0))]
+
+WORDS = ("экзамен сессия расписание лекция семинар практика стипендия конференция "
+         "олимпиада финансы экономика бухгалтерия налоги аудит банк кредит инвестиции "
+         "деканат библиотека общежитие студент преподаватель кафедра защита диплом").split()
+
+CHUNK = 10_000
+
+
+def text(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize()
+
+
+def bulk(table, rows):
+    """executemany пачками по CHUNK строк; rows — генератор словарей"""
+    total, batch = 0, []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == CHUNK:
+            db.session.execute(insert(table), batch)
+            total += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(insert(table), batch)
+        total += len(batch)
+    db.session.commit()
+    return total
+
+
+def seed(counts, rng, lessons_per_day):
+    now = datetime.utcnow()
+    password_hash = generate_password_hash("password", app.config["PASSWORD_HASH_METHOD"])
+    n_teachers = max(counts["groups"], counts["users"] // 50)
+    n_students = counts["users"] - n_teachers - 1
+    report = {}
+
+    report["groups"] = bulk(Group.__table__, (
+        {"id": i, "name": f"ГР-{i:04d}", "course": 1 + i % 4}
+        for i in range(1, counts["groups"] + 1)
+    ))
+    report["subjects"] = bulk(Subject.__table__, (
+        {"id": i, "name": f"{text(rng, 2)} {i}"} for i in range(1, counts["subjects"] + 1)
+    ))
+
+    # id 1 — админ, затем преподаватели, затем студенты
+    teacher_ids = list(range(2, n_teachers + 2))
+    student_ids = list(range(n_teachers + 2, n_teachers + 2 + n_students))
+
+    # executemany берёт набор колонок из первой строки — у всех строк ключи одинаковые
+    def users():
+        yield {"id": 1, "role": "admin", "username": "admin", "email": "admin@bench.local",
+               "password_hash": password_hash, "group_id": None, "course": None,
+               "status": "approved", "created_at": now - timedelta(days=400)}
+        for n, id in enumerate(teacher_ids, 1):
+            yield {"id": id, "role": "teacher", "username": f"teacher{n}", "email": f"teacher{n}@bench.local",
+                   "password_hash": password_hash, "group_id": None, "course": None, "status": "approved",
+                   "created_at": now - timedelta(days=rng.randint(30, 400))}
+        for n, id in enumerate(student_ids, 1):
+            group_id = 1 + n % counts["groups"]
+            yield {"id": id, "role": "student", "username": f"student{n}", "email": f"student{n}@bench.local",
+                   "password_hash": password_hash, "group_id": group_id, "course": 1 + group_id % 4,
+                   # Небольшая доля — необработанные заявки для очереди в админке
+                   "status": "pending" if rng.random() < 0.02 else "approved",
+                   "created_at": now - timedelta(days=rng.randint(0, 400), seconds=rng.randint(0, 86400))}
+    report["users"] = bulk(User.__table__, users())
+
+    subjects_of = {t: rng.sample(range(1, counts["subjects"] + 1), min(3, counts["subjects"]))
+                   for t in teacher_ids}
+    report["teacher_subjects"] = bulk(teacher_subjects, (
+        {"teacher_id": t, "subject_id": s} for t, subjects in subjects_of.items() for s in subjects
+    ))
+
+    def schedules():
+        # Сдвиг по (день, пара) — у преподавателя не больше одного занятия в одном слоте,
+        # пока групп не больше, чем преподавателей
+        for g in range(1, counts["groups"] + 1):
+            for weekday in range(5):
+                for pair in range(lessons_per_day):
+                    teacher = teacher_ids[(g + weekday * 7 + pair) % n_teachers]
+                    start, end = PAIRS[pair % len(PAIRS)]
+                    yield {"group_id": g, "course": 1 + g % 4, "weekday": weekday,
+                           "start_time": start, "end_time": end, "teacher_id": teacher,
+                           "subject_id": rng.choice(subjects_of[teacher]), "created_at": now}
+    report["schedules"] = bulk(Schedule.__table__, schedules())
+
+    authors = [1] + teacher_ids + rng.sample(student_ids, min(len(student_ids), 1000))
+    news_start = now - timedelta(days=365)
+    step = timedelta(days=365) / max(counts["news"], 1)
+    news_created = {}
+
+    def news():
+        for id in range(1, counts["news"] + 1):
+            created_at = news_start + step * id
+            news_created[id] = created_at
+            yield {"id": id, "title": text(rng, rng.randint(3, 8)), "content": text(rng, rng.randint(20, 120)),
+                   "author_id": rng.choice(authors), "created_at": created_at}
+    report["news"] = bulk(News.__table__, news())
+
+    all_users = [1] + teacher_ids + student_ids
+
+    def popular_news():
+        # Скошенное распределение: свежие новости собирают большую часть активности
+        return counts["news"] - int(counts["news"] * rng.random() ** 3)
+
+    def comments():
+        for _ in range(counts["comments"]):
+            news_id = max(1, popular_news())
+            yield {"news_id": news_id, "author_id": rng.choice(all_users), "content": text(rng, rng.randint(3, 30)),
+                   "created_at": news_created[news_id] + timedelta(minutes=rng.randint(1, 60 * 24 * 14))}
+    report["comments"] = bulk(Comments.__table__, comments())
+
+    def likes():
+        seen = set()
+        limit = min(counts["likes"], counts["news"] * len(all_users))
+        while len(seen) < limit:
+            pair = (rng.choice(all_users), max(1, popular_news()))
+            if pair not in seen:
+                seen.add(pair)
+                yield {"user_id": pair[0], "news_id": pair[1]}
+    report["likes"] = bulk(news_likes, likes())
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    for name in SCALES["small"]:
+        parser.add_argument(f"--{name}", type=int, help="переопределить объём из --scale")
+    parser.add_argument("--lessons-per-day", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="удалить все таблицы перед наполнением")
+    args = parser.parse_args()
+
+    counts = dict(SCALES[args.scale])
+    counts.update({name: getattr(args, name) for name in counts if getattr(args, name) is not None})
+
+    with app.app_context():
+        print(f"База: {db.engine.url}")
+        if args.reset:
+            db.drop_all()
+        upgrade_schema(db)
+        if db.session.scalar(db.select(db.func.count()).select_from(User)):
+            sys.exit("В базе уже есть пользователи — запустите с --reset.")
+
+        started = time.perf_counter()
+        report = seed(counts, random.Random(args.seed), args.lessons_per_day)
+        recount_news_counters()
+        # Кэши расписаний и индекс конфликтов пересобираются по новым данным
+        timetables.touch_all()
+        mark_changed()
+        db.session.commit()
+        if not search.create_index(db) and search.available():
+            search.rebuild()
+        elapsed = time.perf_counter() - started
+
+    for name, count in report.items():
+        print(f"{name:<18}{count:>12}")
+    print(f"Готово за {elapsed:.1f} с.")
+
+
+if __name__ == "__main__":
+    main()
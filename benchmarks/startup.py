@@ -0,0 +1,167 @@
+"""
+Время холодного старта и память воркера.
+
+    python benchmarks/startup.py
+    python benchmarks/startup.py --runs 20 --fork --json startup.json
+    python benchmarks/startup.py --fork --compare startup.json
+    python benchmarks/startup.py --importtime
+
+Каждый замер — свежий интерпретатор: import app, create_app(), первый
+запрос (GET /login, без базы) и пик RSS процесса. С --fork процесс после
+старта форкается, как мастер gunicorn с preload_app, и в дочернем процессе
+меряется первый запрос и память, которую воркер не делит с мастером
+(Private_* из /proc/<pid>/smaps_rollup — только Linux).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import gc, json, os, sys, time
+started = time.perf_counter()
+import app as app_module
+imported = time.perf_counter()
+app = app_module.create_app()
+created = time.perf_counter()
+status = app.test_client().get("/login").status_code
+served = time.perf_counter()
+
+
+def maxrss_kb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def smaps():
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line and not line[0].isdigit())
+    except OSError:
+        return {}
+    kb = {name: int(value.split()[0]) for name, value in fields.items()}
+    return {"rss_kb": kb["Rss"], "private_kb": kb["Private_Clean"] + kb["Private_Dirty"]}
+
+
+result = {
+    "import_ms": (imported - started) * 1000,
+    "create_app_ms": (created - imported) * 1000,
+    "first_request_ms": (served - created) * 1000,
+    "ready_ms": (served - started) * 1000,
+    "status": status,
+    "modules": len(sys.modules),
+    "maxrss_kb": maxrss_kb(),
+    **smaps(),
+}
+
+if FORK and hasattr(os, "fork"):
+    # То же, что делает gunicorn.conf.py: gc.freeze() в мастере, dispose_engines() в воркере
+    gc.freeze()
+    read_end, write_end = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        from models import db
+        from utils.database import dispose_engines
+        dispose_engines(app, db)
+        forked = time.perf_counter()
+        app.test_client().get("/login")
+        worker = {"worker_first_request_ms": (time.perf_counter() - forked) * 1000}
+        worker.update({"worker_" + name: value for name, value in smaps().items()})
+        os.write(write_end, json.dumps(worker).encode())
+        os._exit(0)
+    os.close(write_end)
+    data = os.read(read_end, 65536)
+    os.waitpid(pid, 0)
+    result.update(json.loads(data))
+
+print(json.dumps(result))
+"""
+
+
+def probe(fork):
+    code = PROBE.replace("FORK", "True" if fork else "False", 1)
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def summarize(samples):
+    summary = {}
+    for name in samples[0]:
+        values = [s[name] for s in samples if isinstance(s.get(name), (int, float))]
+        if values and name != "status":
+            summary[name] = {"median": round(statistics.median(values), 1),
+                             "min": round(min(values), 1), "max": round(max(values), 1)}
+    return summary
+
+
+def import_profile(limit):
+    """Собственное время импорта по пакетам верхнего уровня (-X importtime)"""
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app; app.create_app()"],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stderr
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, name = line[len("import time:"):].split("|")
+        totals[name.strip().split(".")[0]] += int(self_us)
+    print(f"{'пакет':<24}{'мс':>8}")
+    for name, us in sorted(totals.items(), key=lambda item: item[1], reverse=True)[:limit]:
+        print(f"{name:<24}{us / 1000:>8.1f}")
+
+
+def compare(summary, path):
+    with open(path) as f:
+        baseline = json.load(f)["summary"]
+    print(f"\nСравнение с {path} (медиана):")
+    for name, values in summary.items():
+        before = baseline.get(name)
+        if before and before["median"]:
+            change = (values["median"] - before["median"]) / before["median"] * 100
+            print(f"  {name:<26}{before['median']:>10}{values['median']:>10}{change:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--fork", action="store_true", help="мерить и воркер после fork (как preload_app)")
+    parser.add_argument("--importtime", action="store_true", help="показать, какие пакеты дольше импортируются")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--json", metavar="PATH", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", metavar="PATH", help="сравнить с сохранённым прогоном")
+    args = parser.parse_args()
+
+    if args.importtime:
+        import_profile(args.top)
+        return
+
+    # Первый запуск прогревает .pyc и файловый кэш ОС — в замер не идёт
+    probe(args.fork)
+    samples = [probe(args.fork) for _ in range(args.runs)]
+    summary = summarize(samples)
+    print(f"{'метрика':<26}{'медиана':>10}{'мин':>10}{'макс':>10}")
+    for name, values in summary.items():
+        print(f"{name:<26}{values['median']:>10}{values['min']:>10}{values['max']:>10}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"python": sys.version.split()[0], "runs": args.runs, "fork": args.fork,
+                       "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                       "summary": summary, "samples": samples}, f, indent=2)
+    if args.compare:
+        compare(summary, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import click
+from flask.cli import with_appcontext
+from models import db, recount_news_counters
+from utils.assets import assets
+from utils.migrations import upgrade_schema
+from utils.schedule_import import parse_file, import_schedule
+from utils import search
+
+
+@click.command("recount-counters")
+@with_appcontext
+def recount_counters_command():
+    """Пересчитать like_count/comment_count у всех новостей"""
+    recount_news_counters()
+    print("Счётчики лайков и комментариев пересчитаны.")
+
+
+@click.command("import-schedule")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@with_appcontext
+def import_schedule_command(path):
+    """Импортировать расписание из CSV/JSON файла"""
+    with open(path, encoding="utf-8-sig") as f:
+        rows = parse_file(f, path)
+    inserted, errors = import_schedule(rows)
+    for line, message in errors:
+        print(f"Строка {line}: {message}")
+    if errors:
+        print(f"Импорт отменён: ошибок — {len(errors)}.")
+    else:
+        print(f"Импортировано занятий: {inserted}.")
+
+
+@click.command("build-assets")
+@with_appcontext
+def build_assets_command():
+    """Пересчитать отпечатки static/ и записать сжатые .gz/.br копии"""
+    written = assets.build(precompress=True)
+    for path in written:
+        print(path)
+    print(f"Файлов в манифесте: {len(assets.manifest)}, сжатых копий записано: {len(written)}.")
+
+
+@click.command("search-reindex")
+@with_appcontext
+def search_reindex_command():
+    """Пересобрать полнотекстовый индекс новостей и комментариев"""
+    if search.create_index(db):
+        print("Индекс создан.")
+    elif not search.available():
+        print("FTS5 недоступен — поиск работает через LIKE, индекс не нужен.")
+        return
+    print(f"Записей в индексе: {search.rebuild()}.")
+
+
+@click.command("upgrade-db")
+@with_appcontext
+def upgrade_db_command():
+    """Добавить в существующую базу недостающие таблицы, колонки, индексы и правила ON DELETE"""
+    columns, indexes, rebuilt = upgrade_schema(db)
+    # Пересоздание таблиц удаляет осиротевшие лайки и комментарии — счётчики считаем заново
+    if "news.like_count" in columns or "news.comment_count" in columns or rebuilt:
+        recount_news_counters()
+    if search.create_index(db):
+        indexes.append(search.FTS_TABLE)
+    for name in columns + indexes + rebuilt:
+        print(name)
+    print(f"Колонок добавлено: {len(columns)}, индексов создано: {len(indexes)}, "
+          f"таблиц пересоздано: {len(rebuilt)}.")
+
+
+def init_app(app):
+    for command in (recount_counters_command, import_schedule_command, build_assets_command,
+                    search_reindex_command, upgrade_db_command):
+        app.cli.add_command(command)
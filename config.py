@@ -0,0 +1,52 @@
+import os
+
+
+def load_config(environ=os.environ):
+    """
+    Настройки приложения из окружения (база и пул — в utils/database.py).
+    create_app(config) кладёт поверх них переданный словарь.
+    """
+    config = {
+        "SECRET_KEY": environ.get("SECRET_KEY", "aiwprton"),
+        "SQLALCHEMY_TRACK_MODIFICATIONS": False,
+        # Счётчик SQL-запросов, Server-Timing, предупреждения о N+1 и лог медленных запросов
+        "SQL_INSTRUMENTATION": environ.get("SQL_INSTRUMENTATION", "0") == "1",
+        "SLOW_REQUEST_MS": int(environ.get("SLOW_REQUEST_MS", 500)),
+        "N_PLUS_ONE_THRESHOLD": int(environ.get("N_PLUS_ONE_THRESHOLD", 10)),
+        # Профилирование по ссылке из /admin/profiles или каждого N-го запроса (0 — только по ссылке)
+        "PROFILE_SAMPLE_RATE": int(environ.get("PROFILE_SAMPLE_RATE", 0)),
+        # Асинхронные read-маршруты (views/async_reads.py), нужен aiosqlite
+        "ASYNC_VIEWS": environ.get("ASYNC_VIEWS", "0") == "1",
+        "UPLOAD_FOLDER": os.path.join(os.path.dirname(__file__), "static/uploads"),
+        "MAX_CONTENT_LENGTH": 16 * 1024 * 1024,
+        "NEWS_PER_PAGE": int(environ.get("NEWS_PER_PAGE", 6)),
+        # Кэш страниц для ленты: memory (LRU в процессе), filesystem (общий для воркеров) или null
+        "PAGE_CACHE_TYPE": environ.get("PAGE_CACHE_TYPE", "memory"),
+        "PAGE_CACHE_TTL": int(environ.get("PAGE_CACHE_TTL", 60)),
+        # Живые обновления новостей (SSE): local — внутри процесса, redis — между воркерами, null — выключены
+        "EVENTS_BACKEND": environ.get("EVENTS_BACKEND", "local"),
+        "EVENTS_REDIS_URL": environ.get("EVENTS_REDIS_URL", "redis://localhost:6379/0"),
+        # Открытый поток держит поток воркера gthread до EVENTS_STREAM_TTL: потокам отдаём
+        # не больше четверти WEB_THREADS, остальные страницы опрашивают сервер сами
+        "EVENTS_MAX_STREAMS": int(environ.get("EVENTS_MAX_STREAMS",
+                                              max(1, int(environ.get("WEB_THREADS", 4)) // 4))),
+        # Первый день семестра: от него считаются повторяющиеся события в .ics
+        "SEMESTER_START": environ.get("SEMESTER_START", "2025-09-01"),
+        "ADMIN_STATS_TTL": int(environ.get("ADMIN_STATS_TTL", 30)),
+        "PENDING_PER_PAGE": int(environ.get("PENDING_PER_PAGE", 20)),
+        "COMMENTS_PER_PAGE": int(environ.get("COMMENTS_PER_PAGE", 20)),
+        "SEARCH_PER_PAGE": int(environ.get("SEARCH_PER_PAGE", 10)),
+        # Политика хэширования: метод Werkzeug с параметрами, например "scrypt:16384:8:1"
+        # или "pbkdf2:sha256:600000"; хэши со старой политикой обновляются при входе
+        "PASSWORD_HASH_METHOD": environ.get("PASSWORD_HASH_METHOD", "scrypt"),
+        "PASSWORD_HASH_WORKERS": int(environ.get("PASSWORD_HASH_WORKERS", os.cpu_count() or 1)),
+        # Сжатие и слабые ETag для страниц; пути из COMPRESS_EXCLUDE проходят как есть
+        "COMPRESS_MIN_SIZE": int(environ.get("COMPRESS_MIN_SIZE", 1024)),
+        "COMPRESS_LEVEL": int(environ.get("COMPRESS_LEVEL", 6)),
+        "COMPRESS_EXCLUDE": ("/static/",),
+    }
+    # Без переменной остаются значения по умолчанию из init_app расширений
+    for name in ("SLOW_REQUEST_LOG", "PROFILE_DIR", "PAGE_CACHE_DIR"):
+        if environ.get(name):
+            config[name] = environ[name]
+    return config
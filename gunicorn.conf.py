@@ -0,0 +1,37 @@
+"""
+Настройки gunicorn (pip install gunicorn; Linux/macOS):
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+    WEB_CONCURRENCY=4 WEB_THREADS=8 BIND=0.0.0.0:8000 gunicorn -c gunicorn.conf.py wsgi:app
+
+Память и время старта воркера меряются через benchmarks/startup.py --fork.
+"""
+import gc
+import os
+
+
+bind = os.environ.get("BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("WEB_CONCURRENCY", (os.cpu_count() or 1) * 2 + 1))
+# Больше одного потока — воркер gthread: пока один запрос ждёт базу, другие идут дальше
+threads = int(os.environ.get("WEB_THREADS", 4))
+timeout = int(os.environ.get("WEB_TIMEOUT", 30))
+# Приложение импортируется и собирается в мастере один раз, а не в каждом воркере
+preload_app = True
+# Воркер перезапускается после N запросов — с preload это дешёвый fork, а не новый старт
+max_requests = int(os.environ.get("WEB_MAX_REQUESTS", 5000))
+max_requests_jitter = max_requests // 10
+accesslog = os.environ.get("WEB_ACCESS_LOG")
+
+
+def when_ready(server):
+    # Объекты, созданные при загрузке, уходят в постоянное поколение GC: сборщик в
+    # воркерах их не обходит и не пачкает общие с мастером страницы памяти
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # Пул соединений создан в мастере — воркер не должен пользоваться чужими соединениями
+    from wsgi import app
+    from models import db
+    from utils.database import dispose_engines
+    dispose_engines(app, db)
@@ -1,5 +1,14 @@
-from app import app, db
+from app import create_app
+from models import db, recount_news_counters
+from utils.migrations import upgrade_schema
+from utils import search
+
+# Только база: маршруты, статика и расширения для создания таблиц не нужны
+app = create_app(views=False)
 
 with app.app_context():
-    db.create_all()
+    added, _, rebuilt = upgrade_schema(db)
+    if "news.like_count" in added or "news.comment_count" in added or rebuilt:
+        recount_news_counters()
+    search.create_index(db)
     print("База данных успешно созданно!")
\ No newline at end of file
@@ -7,8 +7,8 @@ db = SQLAlchemy()
 
 teacher_subjects = db.Table(
     'teacher_subjects',
-    db.Column('teacher_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
-    db.Column('subject_id', db.Integer, db.ForeignKey('subjects.id'), primary_key=True)
+    db.Column('teacher_id', db.Integer, db.ForeignKey('users.id', ondelete = 'CASCADE'), primary_key=True),
+    db.Column('subject_id', db.Integer, db.ForeignKey('subjects.id', ondelete = 'CASCADE'), primary_key=True)
 )
 
 class Group(db.Model):
@@ -16,8 +16,9 @@ class Group(db.Model):
     id = db.Column(db.Integer, primary_key = True)
     name = db.Column(db.String(100), unique = True, nullable = False)
     course = db.Column(db.Integer, nullable = False)
-    students = db.relationship('User', back_populates = 'group', lazy = 'dynamic')
-    schedules = db.relationship('Schedule', back_populates = 'group', lazy = 'dynamic')
+    # Удаление группы делает база: студенты остаются без группы, занятия удаляются
+    students = db.relationship('User', back_populates = 'group', lazy = 'dynamic', passive_deletes = True)
+    schedules = db.relationship('Schedule', back_populates = 'group', lazy = 'dynamic', passive_deletes = True)
     __table_args__ = (db.UniqueConstraint('name', 'course', name='uq_group_name_course'),)
 
     def __repr__(self):
@@ -27,7 +28,7 @@ class Subject(db.Model):
     __tablename__ = "subjects"
     id = db.Column(db.Integer, primary_key = True)
     name = db.Column(db.String(120), unique = True, nullable = False)
-    teachers = db.relationship('User', secondary = teacher_subjects, back_populates = "subjects")
+    teachers = db.relationship('User', secondary = teacher_subjects, back_populates = "subjects", lazy = "selectin")
 
     def __repr__(self):
         return f"<Subject {self.name}>"
@@ -42,7 +43,7 @@ class User(db.Model):
     username = db.Column(db.String(50), unique = True, nullable = False)
     email = db.Column(db.String(120), unique = True, nullable = False)
     password_hash = db.Column(db.String(255), nullable = False)
-    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable = True)
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id", ondelete = "SET NULL"), nullable = True)
     group = db.relationship("Group", back_populates = "students")
     course = db.Column(db.Integer, nullable = True)
     subjects = db.relationship('Subject', secondary = teacher_subjects, back_populates = "teachers")
@@ -50,6 +51,12 @@ class User(db.Model):
     profile_image = db.Column(db.String(255), nullable=True, default="default.png")
     created_at = db.Column(db.DateTime, default = datetime.utcnow)
 
+    # Очередь заявок в админке: WHERE status = ? ORDER BY created_at DESC, id DESC; списки по ролям
+    __table_args__ = (
+        db.Index("ix_users_status_created_at_id", "status", "created_at", "id"),
+        db.Index("ix_users_role", "role"),
+    )
+
     def __repr__(self):
         return f"<User {self.username}>"
     
@@ -57,22 +64,26 @@ class User(db.Model):
 class Schedule(db.Model):
     __tablename__ = "schedules"
     id = db.Column(db.Integer, primary_key = True)
-    group_id = db.Column(db.Integer, db.ForeignKey("groups.id"), nullable = False)
-    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id"), nullable = False)
-    teacher_id = db.Column(db.Integer, db.ForeignKey("users.id"))
+    group_id = db.Column(db.Integer, db.ForeignKey("groups.id", ondelete = "CASCADE"), nullable = False)
+    subject_id = db.Column(db.Integer, db.ForeignKey("subjects.id", ondelete = "CASCADE"), nullable = False)
+    teacher_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete = "SET NULL"))
     course = db.Column(db.Integer, nullable = False)
     weekday = db.Column(db.Integer, nullable = False)
     start_time = db.Column(db.Time, nullable = False)
     end_time = db.Column(db.Time, nullable = False)
     created_at = db.Column(db.DateTime, default = datetime.utcnow)
 
-    group = db.relationship("Group", back_populates = "schedules")
-    subject = db.relationship("Subject")
-    teacher = db.relationship("User")
+    # Строки расписания всегда выводятся с группой, предметом и преподавателем
+    group = db.relationship("Group", back_populates = "schedules", lazy = "joined")
+    subject = db.relationship("Subject", lazy = "joined")
+    teacher = db.relationship("User", lazy = "joined")
     
     __table_args__ = (
     db.CheckConstraint('weekday >= 0 AND weekday <= 6', name='ck_weekday'),
     db.UniqueConstraint('group_id', 'course', 'weekday', 'start_time', name='uq_schedule_time'),
+    # Расписание преподавателя и проверка конфликтов по преподавателю
+    db.Index('ix_schedules_teacher_weekday', 'teacher_id', 'weekday', 'start_time'),
+    db.Index('ix_schedules_weekday_start', 'weekday', 'start_time'),
 )
 
     def __repr__(self):
@@ -81,8 +92,10 @@ class Schedule(db.Model):
 
 news_likes = db.Table(
     "news_likes",
-    db.Column("user_id", db.Integer, db.ForeignKey("users.id"), primary_key=True),
-    db.Column("news_id", db.Integer, db.ForeignKey("news.id", ondelete = "CASCADE"), primary_key=True)
+    db.Column("user_id", db.Integer, db.ForeignKey("users.id", ondelete = "CASCADE"), primary_key=True),
+    db.Column("news_id", db.Integer, db.ForeignKey("news.id", ondelete = "CASCADE"), primary_key=True),
+    # PK начинается с user_id — для выборок по новости нужен отдельный индекс
+    db.Index("ix_news_likes_news_id", "news_id"),
 )
 
 
@@ -91,10 +104,16 @@ class Comments(db.Model):
     id = db.Column(db.Integer, primary_key = True)
     content = db.Column(db.Text, nullable = False)
     created_at = db.Column(db.DateTime, default = datetime.utcnow)
-    author_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable = False)
+    author_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete = "CASCADE"), nullable = False)
     news_id = db.Column(db.Integer, db.ForeignKey("news.id", ondelete = "CASCADE"), nullable = False)
 
-    author = db.relationship("User", backref = "comments")
+    author = db.relationship("User", backref = db.backref("comments", passive_deletes = True), lazy = "joined")
+
+    # Комментарии новости в порядке публикации; счётчики по автору в профиле
+    __table_args__ = (
+        db.Index("ix_comments_news_created_at_id", "news_id", "created_at", "id"),
+        db.Index("ix_comments_author_id", "author_id"),
+    )
     
 
 class News(db.Model):
@@ -103,23 +122,115 @@ class News(db.Model):
     title = db.Column(db.String(255), nullable = False)
     content = db.Column(db.Text, nullable = False)
     created_at = db.Column(db.DateTime, default = datetime.utcnow)
-    author_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable = False)
+    author_id = db.Column(db.Integer, db.ForeignKey("users.id", ondelete = "CASCADE"), nullable = False)
+    # Денормализованные счётчики: лента и карточка не трогают news_likes/comments ради цифр
+    like_count = db.Column(db.Integer, nullable = False, default = 0, server_default = "0")
+    comment_count = db.Column(db.Integer, nullable = False, default = 0, server_default = "0")
 
 
-    author = db.relationship("User")
-    likes = db.relationship("User", secondary=news_likes, backref="liked_news")
+    author = db.relationship("User", lazy = "joined")
+    # Лайки и комментарии удаляет ON DELETE CASCADE — ORM не загружает их перед удалением новости
+    likes = db.relationship("User", secondary=news_likes, backref="liked_news", passive_deletes=True)
     comments = db.relationship(
         "Comments",
         backref="news",
         cascade="all, delete-orphan",
+        passive_deletes=True,
         lazy=True
     )
 
+    # Индекс под ленту: ORDER BY created_at DESC, id DESC + keyset-условие
+    __table_args__ = (
+        db.Index("ix_news_created_at_id", "created_at", "id"),
+        db.Index("ix_news_author_id", "author_id"),
+    )
+
     def __repr__(self):
         return f"<News {self.title}>"
 
 
+class DataVersion(db.Model):
+    """Счётчики версий данных: по ним процессы узнают, что их кэш устарел"""
+    __tablename__ = "data_versions"
+    name = db.Column(db.String(64), primary_key = True)
+    version = db.Column(db.Integer, nullable = False, default = 0)
 
+    def __repr__(self):
+        return f"<DataVersion {self.name}={self.version}>"
 
-    
 
+class Timetable(db.Model):
+    """Готовое недельное расписание группы/курса или преподавателя в сжатом JSON"""
+    __tablename__ = "timetables"
+    key = db.Column(db.String(64), primary_key = True)
+    version = db.Column(db.String(32), nullable = False)
+    data = db.Column(db.Text, nullable = False)
+    updated_at = db.Column(db.DateTime, default = datetime.utcnow, onupdate = datetime.utcnow)
+
+    def __repr__(self):
+        return f"<Timetable {self.key} v{self.version}>"
+
+
+def get_version(name):
+    return db.session.scalar(db.select(DataVersion.version).where(DataVersion.name == name)) or 0
+
+
+def bump_version(name):
+    """Увеличивает версию в текущей транзакции и возвращает новое значение"""
+    updated = db.session.execute(
+        db.update(DataVersion)
+        .where(DataVersion.name == name)
+        .values(version = DataVersion.version + 1)
+    ).rowcount
+    if not updated:
+        db.session.add(DataVersion(name = name, version = 1))
+        db.session.flush()
+    return get_version(name)
+
+
+def recount_news_counters():
+    """Пересчитывает like_count/comment_count по news_likes и comments одним UPDATE"""
+    likes = (
+        db.select(db.func.count())
+        .select_from(news_likes)
+        .where(news_likes.c.news_id == News.id)
+        .scalar_subquery()
+    )
+    comments = (
+        db.select(db.func.count(Comments.id))
+        .where(Comments.news_id == News.id)
+        .scalar_subquery()
+    )
+    db.session.execute(db.update(News).values(like_count = likes, comment_count = comments))
+    db.session.commit()
+
+
+def set_like(news_id, user_id, liked):
+    """
+    Ставит (liked=True) или снимает лайк и сдвигает like_count в той же транзакции.
+    Повтор ничего не меняет: вставка — INSERT ... ON CONFLICT DO NOTHING (INSERT OR IGNORE
+    в SQLite), а не проверка перед вставкой, так что два одновременных клика не дадут +2.
+    Возвращает True, если лайк действительно поставлен или снят.
+    """
+    if liked:
+        dialect = db.session.get_bind().dialect.name
+        if dialect == "sqlite":
+            from sqlalchemy.dialects import sqlite
+            statement = sqlite.insert(news_likes).on_conflict_do_nothing()
+        elif dialect == "postgresql":
+            from sqlalchemy.dialects import postgresql
+            statement = postgresql.insert(news_likes).on_conflict_do_nothing()
+        else:
+            statement = db.insert(news_likes).prefix_with("IGNORE")
+        changed = db.session.execute(statement.values(news_id = news_id, user_id = user_id)).rowcount
+    else:
+        changed = db.session.execute(
+            news_likes.delete()
+            .where(news_likes.c.news_id == news_id, news_likes.c.user_id == user_id)
+        ).rowcount
+    if changed:
+        delta = 1 if liked else -1
+        db.session.execute(
+            db.update(News).where(News.id == news_id).values(like_count = News.like_count + delta)
+        )
+    return bool(changed)
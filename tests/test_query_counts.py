@@ -0,0 +1,138 @@
+"""
+Число SQL-запросов на страницу не должно зависеть от числа строк:
+ленту, новость с комментариями, профиль и админку расписания
+открываем на маленькой и на большой базе и сравниваем счётчики.
+
+    python -m pytest -q tests
+"""
+import os
+import sys
+from datetime import time
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app
+from models import db, User, News, Comments, Group, Subject, Schedule, news_likes, recount_news_counters
+from utils import search
+
+
+# Страница → от чьего имени её открывать
+PAGES = {"/": "student", "/news/1": "student", "/profile": "teacher", "/admin/schedule": "admin"}
+SCALES = (2, 8)
+# Потолок на случай, если страница станет тяжелее; рост с данными ловит сравнение масштабов
+MAX_QUERIES = 10
+
+
+def seed(scale):
+    """scale групп, по scale студентов в группе, scale новостей с комментариями и лайками"""
+    users = [
+        User(username="admin", email="admin@test", password_hash="-", role="admin", status="approved"),
+        User(username="teacher", email="teacher@test", password_hash="-", role="teacher", status="approved"),
+    ]
+    subjects = [Subject(name=f"Предмет {i}") for i in range(scale)]
+    groups = [Group(name=f"Группа {i}", course=1) for i in range(scale)]
+    db.session.add_all(users + subjects + groups)
+    db.session.flush()
+    admin, teacher = users
+    teacher.subjects = subjects
+
+    students = [
+        User(username=f"student{g}_{i}", email=f"student{g}_{i}@test", password_hash="-",
+             role="student", status="approved", group_id=group.id, course=1)
+        for g, group in enumerate(groups) for i in range(scale)
+    ]
+    db.session.add_all(students)
+    db.session.flush()
+
+    # Новость 1 — самая старая: у неё и комментарии, и лайки всех студентов
+    news = [News(title=f"Новость {i}", content="текст", author_id=teacher.id) for i in range(scale)]
+    db.session.add_all(news)
+    db.session.flush()
+    for post in news:
+        db.session.add_all(Comments(content="комментарий", author_id=student.id, news_id=post.id)
+                           for student in students)
+        db.session.execute(news_likes.insert(), [{"news_id": post.id, "user_id": student.id}
+                                                 for student in students])
+    db.session.add_all(
+        Schedule(group_id=group.id, course=1, subject_id=subjects[day % scale].id, teacher_id=teacher.id,
+                 weekday=day % 6, start_time=time(8 + day // 6, 0), end_time=time(9 + day // 6, 0))
+        for group in groups for day in range(scale)
+    )
+    db.session.commit()
+    recount_news_counters()
+    return {"admin": admin.id, "teacher": teacher.id, "student": students[0].id}
+
+
+def make_app(path, scale):
+    app = create_app({
+        "TESTING": True,
+        "SQLALCHEMY_DATABASE_URI": f"sqlite:///{path}",
+        "PAGE_CACHE_TYPE": "null",
+        "NEWS_PER_PAGE": 6,
+        "COMMENTS_PER_PAGE": 20,
+    })
+    with app.app_context():
+        db.create_all()
+        search.create_index(db)
+        users = seed(scale)
+    return app, users
+
+
+def login(app, user_id):
+    client = app.test_client()
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        with client.session_transaction() as session:
+            session.update(user_id=user.id, role=user.role)
+    return client
+
+
+def count_queries(app, client, path, warm=True):
+    """
+    warm — считать запросы второго открытия, когда ленивые кэши (расписание,
+    статистика) уже собраны; иначе первого, вместе с их сборкой
+    """
+    if warm:
+        assert client.get(path).status_code == 200
+    queries = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        queries.append(statement)
+
+    with app.app_context():
+        engine = db.engine
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        assert client.get(path).status_code == 200
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    return len(queries)
+
+
+@pytest.fixture(scope="module")
+def query_counts(tmp_path_factory):
+    """{scale: {страница: число запросов}} для маленькой и большой базы"""
+    counts = {}
+    for scale in SCALES:
+        app, users = make_app(tmp_path_factory.mktemp("db") / "test.db", scale)
+        clients = {role: login(app, user_id) for role, user_id in users.items()}
+        # Профиль с пересборкой расписания — до того, как остальные страницы его соберут
+        counts[scale] = {"/profile (сборка расписания)": count_queries(app, clients["teacher"], "/profile", warm=False)}
+        counts[scale].update({path: count_queries(app, clients[role], path) for path, role in PAGES.items()})
+        with app.app_context():
+            db.engine.dispose()
+    return counts
+
+
+@pytest.mark.parametrize("path", [*PAGES, "/profile (сборка расписания)"])
+def test_query_count_does_not_grow_with_rows(query_counts, path):
+    small, large = (query_counts[scale][path] for scale in SCALES)
+    assert small == large, f"{path}: {small} запросов на маленькой базе, {large} на большой"
+
+
+@pytest.mark.parametrize("path", PAGES)
+def test_query_count_is_small(query_counts, path):
+    assert query_counts[SCALES[-1]][path] <= MAX_QUERIES
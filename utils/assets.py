@@ -0,0 +1,156 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import os
+from flask import request, send_from_directory
+
+try:
+    import brotli
+except ImportError:  # brotli необязателен: без него раздаём только .gz
+    brotli = None
+
+
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".txt", ".map", ".html", ".xml"}
+MIN_COMPRESS_SIZE = 512
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+logger = logging.getLogger(__name__)
+
+
+def _digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def _hashed_name(filename, digest):
+    base, ext = os.path.splitext(filename)
+    return f"{base}.{digest}{ext}"
+
+
+def _compress(path):
+    """
+    Пишет .gz (и .br, если есть brotli) рядом с файлом, если их нет или они старше.
+    static/ только для чтения — не ошибка: копия пропускается, файл раздаётся несжатым.
+    """
+    written = []
+    with open(path, "rb") as f:
+        data = f.read()
+    mtime = os.path.getmtime(path)
+    targets = [(".gz", lambda d: gzip.compress(d, 9, mtime=0))]
+    if brotli is not None:
+        targets.append((".br", lambda d: brotli.compress(d, quality=11)))
+    for suffix, compress in targets:
+        target = path + suffix
+        if os.path.exists(target) and os.path.getmtime(target) >= mtime:
+            continue
+        try:
+            with open(target, "wb") as f:
+                f.write(compress(data))
+        except OSError as e:
+            logger.warning("Не удалось записать %s: %s", target, e)
+            continue
+        written.append(target)
+    return written
+
+
+class Assets:
+    """
+    Отпечатки для файлов из static/: url_for('static', filename='css/style.css')
+    даёт /static/css/style.<sha256[:12]>.css. Такие адреса раздаются с
+    Cache-Control: immutable и заранее сжатыми .br/.gz по Accept-Encoding.
+    Каталог uploads/ не трогаем — его содержимое меняется во время работы.
+    """
+
+    def __init__(self, app=None):
+        self.manifest = {}
+        self.reverse = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("ASSETS_FINGERPRINT", True)
+        app.config.setdefault("ASSETS_EXCLUDE", ("uploads",))
+        # Сжатые копии пишутся при сборке (flask build-assets), а не при каждом старте
+        app.config.setdefault("ASSETS_PRECOMPRESS", False)
+        self.app = app
+        self.static_folder = app.static_folder
+        app.extensions["assets"] = self
+        if not app.config["ASSETS_FINGERPRINT"]:
+            return
+
+        self.build(precompress=app.config["ASSETS_PRECOMPRESS"])
+        app.url_defaults(self._url_defaults)
+        app.view_functions["static"] = self._serve
+
+    def _files(self):
+        excluded = tuple(self.app.config["ASSETS_EXCLUDE"])
+        for root, dirs, files in os.walk(self.static_folder):
+            rel_root = os.path.relpath(root, self.static_folder)
+            if rel_root != "." and rel_root.replace(os.sep, "/").split("/")[0] in excluded:
+                dirs[:] = []
+                continue
+            for name in files:
+                if name.endswith((".gz", ".br")):
+                    continue
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, self.static_folder).replace(os.sep, "/"), path
+
+    def build(self, precompress=True):
+        """Пересчитывает манифест; возвращает список записанных сжатых файлов"""
+        manifest, written = {}, []
+        for filename, path in self._files():
+            manifest[filename] = (_hashed_name(filename, _digest(path)), os.path.getmtime(path))
+            if (precompress and os.path.splitext(filename)[1] in COMPRESSIBLE
+                    and os.path.getsize(path) >= MIN_COMPRESS_SIZE):
+                written += _compress(path)
+        self.manifest = manifest
+        self.reverse = {hashed: filename for filename, (hashed, _) in manifest.items()}
+        return written
+
+    def _refresh(self, filename):
+        # В режиме отладки CSS правят на ходу — пересчитываем отпечаток по mtime
+        path = os.path.join(self.static_folder, filename)
+        hashed, mtime = self.manifest[filename]
+        if os.path.getmtime(path) != mtime:
+            self.reverse.pop(hashed, None)
+            hashed = _hashed_name(filename, _digest(path))
+            self.manifest[filename] = (hashed, os.path.getmtime(path))
+            self.reverse[hashed] = filename
+            if os.path.splitext(filename)[1] in COMPRESSIBLE:
+                _compress(path)
+
+    def _url_defaults(self, endpoint, values):
+        if endpoint != "static":
+            return
+        filename = values.get("filename")
+        if filename in self.manifest:
+            if self.app.debug:
+                self._refresh(filename)
+            values["filename"] = self.manifest[filename][0]
+
+    def _serve(self, filename):
+        original = self.reverse.get(filename)
+        if original is None:
+            return self.app.send_static_file(filename)
+
+        mimetype = mimetypes.guess_type(original)[0] or "application/octet-stream"
+        encodings = request.accept_encodings
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            if encodings[encoding] and os.path.exists(os.path.join(self.static_folder, original + suffix)):
+                response = send_from_directory(self.static_folder, original + suffix,
+                                               mimetype=mimetype, max_age=31536000)
+                response.headers["Content-Encoding"] = encoding
+                break
+        else:
+            response = send_from_directory(self.static_folder, original, mimetype=mimetype,
+                                           max_age=31536000)
+        response.headers["Cache-Control"] = IMMUTABLE
+        response.vary.add("Accept-Encoding")
+        return response
+
+
+assets = Assets()
@@ -0,0 +1,90 @@
+import asyncio
+import os
+import threading
+from sqlalchemy import event
+from utils.database import apply_pragmas
+
+
+# Асинхронный драйвер для бэкенда из DATABASE_URL
+ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+
+def async_url(url):
+    """sqlite:///... → sqlite+aiosqlite:///... (и так же для других бэкендов)"""
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Нет асинхронного драйвера для {backend}")
+    return url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+
+
+class AsyncDatabase:
+    """
+    Асинхронный движок SQLAlchemy для read-маршрутов в режиме ASYNC_VIEWS.
+    Чтения всех запросов процесса выполняются в одном цикле событий в отдельном
+    потоке (вместо нового цикла на каждый запрос, как делает Flask через asgiref):
+    пул соединений живёт между запросами, а пока один запрос ждёт базу, цикл
+    ведёт остальные. gather() даёт независимым чтениям одной страницы по
+    соединению — SQLite в WAL читает их параллельно. В цикл уходят только
+    запросы к базе (run); пользователь сессии и шаблоны — в потоке запроса.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.engine = None
+        self._loop = None
+        self._pid = None
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        app.config.setdefault("ASYNC_DATABASE_URI", None)
+        app.extensions["async_db"] = self
+        self.url = app.config["ASYNC_DATABASE_URI"]
+        if self.url is None:
+            # URL синхронного движка: Flask-SQLAlchemy уже привёл относительный путь SQLite к instance/
+            with app.app_context():
+                self.url = async_url(db.engine.url)
+        # Те же размеры пула и таймауты, что у синхронного движка (DB_POOL_*)
+        self.options = dict(app.config["SQLALCHEMY_ENGINE_OPTIONS"])
+        # Запросы асинхронного движка попадают в ту же статистику запроса (Server-Timing, N+1)
+        self.instrumentation = app.extensions.get("sql_instrumentation")
+
+    def _start(self):
+        # Поток цикла и пул — свои в каждом процессе: после fork воркер их заводит заново
+        with self._lock:
+            if self._pid != os.getpid():
+                # sqlalchemy.ext.asyncio тянет greenlet — импортируется при первом async-запросе
+                from sqlalchemy.ext.asyncio import create_async_engine
+                engine = create_async_engine(self.url, **self.options)
+                if engine.dialect.name == "sqlite":
+                    event.listen(engine.sync_engine, "connect",
+                                 lambda dbapi_connection, record: apply_pragmas(dbapi_connection))
+                if self.instrumentation is not None:
+                    self.instrumentation.instrument(engine.sync_engine)
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-db", daemon=True).start()
+                self.engine, self._loop, self._pid = engine, loop, os.getpid()
+        return self._loop
+
+    def run(self, func, *args, **kwargs):
+        """Выполняет корутину func(*args, **kwargs) в общем цикле, поток запроса ждёт результат"""
+        loop = self._loop if self._pid == os.getpid() else self._start()
+        # Задача получает копию contextvars вызывающего потока — request, session, g доступны
+        return asyncio.run_coroutine_threadsafe(func(*args, **kwargs), loop).result()
+
+    def session(self):
+        from sqlalchemy.ext.asyncio import AsyncSession
+        return AsyncSession(self.engine, expire_on_commit=False)
+
+    async def gather(self, *calls):
+        """
+        Выполняет await call(session) для каждого вызова одновременно,
+        каждый в своей сессии; результаты — в том же порядке
+        """
+        async def run(call):
+            async with self.session() as session:
+                return await call(session)
+        return await asyncio.gather(*(run(call) for call in calls))
+
+
+async_db = AsyncDatabase()
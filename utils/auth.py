@@ -1,14 +1,44 @@
 from functools import wraps
-from flask import session, redirect, url_for, flash
+from flask import session, redirect, url_for, flash, g
+from werkzeug.local import LocalProxy
 from models import User, db
 
 
+def login_user(user):
+    """Сохраняет в подписанной сессии id и снимок роли (для admin_required и шаблонов)"""
+    session["user_id"] = user.id
+    session["role"] = user.role
+
+
+def get_current_user():
+    """
+    Текущий пользователь, загружается не больше одного раза за запрос.
+    Если роль разошлась со снимком в сессии или пользователь больше не одобрен,
+    сессия сбрасывается — сверка идёт по уже загруженной строке, без лишних запросов.
+    """
+    if "current_user" not in g:
+        user = None
+        if "user_id" in session:
+            user = db.session.get(User, session["user_id"])
+            if user is None or user.role != session.get("role") or user.status != "approved":
+                session.clear()
+                user = None
+        g.current_user = user
+    return g.current_user
+
+
+current_user = LocalProxy(get_current_user)
+
+
 def login_required(f):
     @wraps(f)
     def decorated_function(*args, **kwargs):
         if "user_id" not in session:
             flash("Сначала зарегистрируйтесь или выполните вход.", "warning")
-            return redirect(url_for("login"))
+            return redirect(url_for("auth.login"))
+        if get_current_user() is None:
+            flash("Сессия устарела, выполните вход заново.", "warning")
+            return redirect(url_for("auth.login"))
         return f(*args, **kwargs)
     return decorated_function
 
@@ -18,12 +48,18 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if "user_id" not in session:
             flash("Сначала зарегистрируйтесь или выполните вход.", "error")
-            return redirect(url_for("login"))
-        
-        current_user = User.query.get(session["user_id"])
+            return redirect(url_for("auth.login"))
+
+        # Не-админов отсекаем по снимку роли в сессии, без запроса к базе
+        if session.get("role") != "admin":
+            flash("У вас нет доступа к этой странице.", "danger")
+            return redirect(url_for("auth.login"))
+
+        # Для админа снимок подтверждается тем же пользователем, что получит view
+        current_user = get_current_user()
         if not current_user or current_user.role != "admin":
             flash("У вас нет доступа к этой странице.", "danger")
-            return redirect(url_for("login"))
-        
+            return redirect(url_for("auth.login"))
+
         return f(*args, **kwargs)
     return decorated_function
@@ -0,0 +1,219 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+from flask import g, request, session, make_response
+
+
+class MemoryBackend:
+    """LRU в памяти процесса с TTL на каждую запись"""
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at and expires_at < time.time():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=0):
+        expires_at = time.time() + ttl if ttl else 0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class FileSystemBackend:
+    """
+    Кэш в каталоге на диске — общий для нескольких воркеров на одной машине.
+    Не больше maxsize файлов: каждые sweep_every записей самые давно
+    прочитанные (по mtime) удаляются до 90% лимита.
+    """
+
+    def __init__(self, directory, maxsize=512, sweep_every=64):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.sweep_every = sweep_every
+        self._writes = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha1(key.encode()).hexdigest())
+
+    def get(self, key):
+        try:
+            with open(self._path(key), "rb") as f:
+                expires_at, value = pickle.load(f)
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at and expires_at < time.time():
+            self.delete(key)
+            return None
+        # mtime — время последнего чтения, по нему вытесняются записи при переполнении
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            pass
+        return value
+
+    def set(self, key, value, ttl=0):
+        expires_at = time.time() + ttl if ttl else 0
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((expires_at, value), f, pickle.HIGHEST_PROTOCOL)
+        # os.replace атомарен: параллельный читатель видит старую или новую версию
+        os.replace(tmp, self._path(key))
+        self._writes += 1
+        if self._writes % self.sweep_every == 0:
+            self.sweep()
+
+    def sweep(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.startswith(".tmp"):
+                continue
+            try:
+                entries.append((entry.stat().st_mtime, entry.path))
+            except FileNotFoundError:
+                pass
+        if len(entries) <= self.maxsize:
+            return
+        entries.sort()
+        for _, path in entries[:len(entries) - self.maxsize * 9 // 10]:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        for name in os.listdir(self.directory):
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+class PageCache:
+    """
+    Кэш готовых страниц. Ключ — путь с query string и признак вход/аноним.
+    Каждая запись помнит версии своих тегов ("feed", "news:<id>");
+    invalidate(tag) меняет версию тега и тем самым сбрасывает только те
+    страницы, которые этот тег содержат.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self.ttl = 60
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PAGE_CACHE_TYPE", "memory")
+        app.config.setdefault("PAGE_CACHE_DIR", os.path.join(app.instance_path, "page_cache"))
+        app.config.setdefault("PAGE_CACHE_TTL", 60)
+        app.config.setdefault("PAGE_CACHE_SIZE", 512)
+
+        cache_type = app.config["PAGE_CACHE_TYPE"]
+        if cache_type == "memory":
+            self.backend = MemoryBackend(app.config["PAGE_CACHE_SIZE"])
+        elif cache_type == "filesystem":
+            self.backend = FileSystemBackend(app.config["PAGE_CACHE_DIR"], app.config["PAGE_CACHE_SIZE"])
+        elif cache_type == "null":
+            self.backend = None
+        else:
+            raise ValueError(f"Неизвестный PAGE_CACHE_TYPE: {cache_type}")
+        self.ttl = app.config["PAGE_CACHE_TTL"]
+        app.extensions["page_cache"] = self
+
+    def _version(self, tag):
+        return self.backend.get(f"tag:{tag}") or 0
+
+    def invalidate(self, *tags):
+        if self.backend is None:
+            return
+        for tag in tags:
+            # time_ns вместо счётчика: даже если ключ версии вытеснен из LRU,
+            # новая версия не совпадёт ни с одной сохранённой
+            self.backend.set(f"tag:{tag}", time.time_ns())
+
+    def tag(self, *tags):
+        """Добавить теги к странице, которая сейчас рендерится"""
+        if self.backend is None:
+            return
+        page_tags = g.setdefault("page_cache_tags", {})
+        for tag in tags:
+            page_tags.setdefault(tag, self._version(tag))
+
+    def _key(self, query_args):
+        """
+        Путь, признак вход/аноним и только те параметры, от которых страница зависит.
+        None — в запросе есть другие (или повторённые) параметры: такой запрос
+        не кэшируется, иначе /?x=<случайное> заводил бы новую запись на каждый запрос.
+        """
+        args = request.args
+        if any(name not in query_args or len(args.getlist(name)) > 1 for name in args):
+            return None
+        state = "auth" if "user_id" in session else "anon"
+        return f"page:{state}:{request.path}?{urlencode(sorted(args.items()))}"
+
+    def cached(self, f=None, query_args=("after", "before")):
+        """@page_cache.cached или @page_cache.cached(query_args=(...)) — параметры, которые читает view"""
+        if f is None:
+            return lambda f: self.cached(f, query_args)
+
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            key = self._key(query_args) if self.backend is not None and request.method == "GET" else None
+            if key is None:
+                return f(*args, **kwargs)
+
+            entry = self.backend.get(key)
+            if entry is not None:
+                status, headers, body, tags = entry
+                if all(self._version(tag) == version for tag, version in tags.items()):
+                    response = make_response(body, status, headers)
+                    response.headers["X-Cache"] = "HIT"
+                    return response
+
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and not session.modified:
+                tags = g.get("page_cache_tags", {})
+                headers = [(k, v) for k, v in response.headers
+                           if k not in ("Set-Cookie", "Content-Length")]
+                self.backend.set(key, (200, headers, response.get_data(), tags), self.ttl)
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return decorated_function
+
+
+page_cache = PageCache()
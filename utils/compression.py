@@ -0,0 +1,144 @@
+import hashlib
+import zlib
+from functools import wraps
+from flask import make_response
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_etags, parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # без brotli сжимаем только gzip
+    brotli = None
+
+
+SKIP_HEADER = "X-Transform-Skip"
+
+COMPRESSIBLE_TYPES = (
+    "text/html", "text/plain", "text/css", "text/calendar", "text/csv",
+    "application/json", "application/javascript", "image/svg+xml",
+)
+
+
+def transform_options(etag=True, compress=True):
+    """Отключает ETag и/или сжатие для отдельного маршрута"""
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            response = make_response(f(*args, **kwargs))
+            skip = [name for name, enabled in (("etag", etag), ("compress", compress)) if not enabled]
+            if skip:
+                response.headers[SKIP_HEADER] = ",".join(skip)
+            return response
+        return decorated_function
+    return decorator
+
+
+class CompressionMiddleware:
+    """
+    WSGI-обёртка над приложением:
+    - для ответов 200 без своего ETag и без Set-Cookie (в т.ч. со снятыми flash-сообщениями)
+      считает слабый ETag по телу и отвечает 304 на совпавший If-None-Match;
+    - сжимает gzip/brotli ответы больше min_size; если ETag не нужен — потоково, по кускам.
+    Редиректы, ошибки, text/event-stream и уже сжатые ответы проходят как есть.
+    """
+
+    def __init__(self, app, min_size=1024, level=6, exclude=()):
+        self.app = app
+        self.min_size = min_size
+        self.level = level
+        self.exclude = tuple(exclude)
+
+    def _encoding(self, environ):
+        accept = parse_accept_header(environ.get("HTTP_ACCEPT_ENCODING", ""))
+        if brotli is not None and accept["br"]:
+            return "br"
+        if accept["gzip"]:
+            return "gzip"
+        return None
+
+    def _compressor(self, encoding):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=5)
+            return compressor.process, compressor.finish
+        compressor = zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return compressor.compress, compressor.flush
+
+    def __call__(self, environ, start_response):
+        if environ.get("REQUEST_METHOD") != "GET" or environ.get("PATH_INFO", "").startswith(self.exclude):
+            return self.app(environ, start_response)
+
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured["status"] = status
+            captured["headers"] = headers
+            captured["exc_info"] = exc_info
+            return lambda data: captured.setdefault("written", []).append(data)
+
+        app_iter = self.app(environ, capture)
+        status = captured["status"]
+        headers = Headers(captured["headers"])
+        skip = set(filter(None, headers.pop(SKIP_HEADER, "").split(",")))
+        content_type = headers.get("Content-Type", "").split(";")[0].strip()
+
+        if (not status.startswith("200") or content_type not in COMPRESSIBLE_TYPES
+                or "Content-Encoding" in headers or "written" in captured):
+            start_response(status, headers.to_wsgi_list(), captured["exc_info"])
+            return app_iter
+
+        encoding = None if "compress" in skip else self._encoding(environ)
+        want_etag = "etag" not in skip and "ETag" not in headers and "Set-Cookie" not in headers
+
+        if want_etag:
+            try:
+                body = b"".join(app_iter)
+            finally:
+                if hasattr(app_iter, "close"):
+                    app_iter.close()
+            etag = f'W/"{hashlib.sha1(body).hexdigest()[:20]}"'
+            headers["ETag"] = etag
+            if parse_etags(environ.get("HTTP_IF_NONE_MATCH")).contains_weak(etag[2:].strip('"')):
+                kept = [(k, v) for k, v in headers.items() if k in ("ETag", "Cache-Control", "Vary", "Expires")]
+                start_response("304 Not Modified", kept)
+                return []
+            if encoding and len(body) >= self.min_size:
+                compress, flush = self._compressor(encoding)
+                body = compress(body) + flush()
+                headers["Content-Encoding"] = encoding
+                self._add_vary(headers)
+            headers["Content-Length"] = str(len(body))
+            start_response(status, headers.to_wsgi_list(), captured["exc_info"])
+            return [body]
+
+        length = headers.get("Content-Length", type=int)
+        if not encoding or (length is not None and length < self.min_size):
+            start_response(status, headers.to_wsgi_list(), captured["exc_info"])
+            return app_iter
+
+        # Представление меняется — сильный ETag из view становится слабым
+        if "ETag" in headers and not headers["ETag"].startswith("W/"):
+            headers["ETag"] = "W/" + headers["ETag"]
+        headers.pop("Content-Length", None)
+        headers["Content-Encoding"] = encoding
+        self._add_vary(headers)
+        start_response(status, headers.to_wsgi_list(), captured["exc_info"])
+        return self._stream(app_iter, encoding)
+
+    def _stream(self, app_iter, encoding):
+        compress, flush = self._compressor(encoding)
+        try:
+            for chunk in app_iter:
+                data = compress(chunk)
+                if data:
+                    yield data
+            yield flush()
+        finally:
+            if hasattr(app_iter, "close"):
+                app_iter.close()
+
+    @staticmethod
+    def _add_vary(headers):
+        vary = [v.strip() for v in headers.get("Vary", "").split(",") if v.strip()]
+        if "Accept-Encoding" not in vary:
+            vary.append("Accept-Encoding")
+        headers["Vary"] = ", ".join(vary)
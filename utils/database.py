@@ -0,0 +1,84 @@
+import os
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+def database_config(environ=os.environ):
+    """
+    Настройки движка из окружения:
+      DATABASE_URL                       — URI базы (по умолчанию sqlite:///iqr.db)
+      DB_POOL_SIZE, DB_MAX_OVERFLOW,
+      DB_POOL_TIMEOUT, DB_POOL_RECYCLE   — размеры и таймауты пула соединений
+    """
+    uri = environ.get("DATABASE_URL", "sqlite:///iqr.db")
+    options = {"pool_pre_ping": environ.get("DB_POOL_PRE_PING", "0") == "1"}
+    # Для :memory: SQLAlchemy берёт SingletonThreadPool, размеры пула к нему не применимы
+    if ":memory:" not in uri and uri != "sqlite://":
+        options.update(
+            pool_size=int(environ.get("DB_POOL_SIZE", 10)),
+            max_overflow=int(environ.get("DB_MAX_OVERFLOW", 20)),
+            pool_timeout=int(environ.get("DB_POOL_TIMEOUT", 30)),
+            pool_recycle=int(environ.get("DB_POOL_RECYCLE", 1800)),
+        )
+    return {
+        "SQLALCHEMY_DATABASE_URI": uri,
+        "SQLALCHEMY_ENGINE_OPTIONS": options,
+    }
+
+
+def sqlite_pragmas(environ=os.environ):
+    """
+    PRAGMA для каждого нового соединения SQLite:
+    WAL — читатели не блокируют писателя; busy_timeout — ждать блокировку,
+    а не падать с "database is locked"; synchronous=NORMAL безопасен в WAL;
+    cache_size < 0 — размер кэша страниц в КиБ; foreign_keys — без него SQLite
+    не проверяет внешние ключи и не выполняет ON DELETE CASCADE / SET NULL.
+    """
+    return {
+        "journal_mode": environ.get("SQLITE_JOURNAL_MODE", "WAL"),
+        "busy_timeout": int(environ.get("SQLITE_BUSY_TIMEOUT_MS", 5000)),
+        "synchronous": environ.get("SQLITE_SYNCHRONOUS", "NORMAL"),
+        "cache_size": -int(environ.get("SQLITE_CACHE_SIZE_KB", 20000)),
+        "temp_store": "MEMORY",
+        "foreign_keys": "ON",
+    }
+
+
+_pragmas = {}
+
+
+def apply_pragmas(dbapi_connection):
+    cursor = dbapi_connection.cursor()
+    for name, value in _pragmas.items():
+        cursor.execute(f"PRAGMA {name}={value}")
+    cursor.close()
+
+
+@event.listens_for(Engine, "connect")
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    if not isinstance(dbapi_connection, sqlite3.Connection) or not _pragmas:
+        return
+    apply_pragmas(dbapi_connection)
+
+
+def init_database(app, db):
+    # URI из create_app(config) важнее DATABASE_URL; опции пула считаются под него
+    environ = os.environ
+    if "SQLALCHEMY_DATABASE_URI" in app.config:
+        environ = {**environ, "DATABASE_URL": app.config["SQLALCHEMY_DATABASE_URI"]}
+    for name, value in database_config(environ).items():
+        app.config.setdefault(name, value)
+    _pragmas.update(sqlite_pragmas())
+    db.init_app(app)
+
+
+def dispose_engines(app, db):
+    """
+    Вызывается в воркере сразу после fork: соединения из пула родителя
+    не закрываем (их сокеты/файлы общие с мастером), а просто забываем —
+    воркер откроет свои.
+    """
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,226 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from itertools import count
+from flask import Response
+
+
+class Subscription:
+    """
+    Очередь событий одного открытого потока. События с ключом (например, счётчики)
+    схлопываются: в очереди остаётся только последнее. Очередь ограничена —
+    если клиент не успевает читать, вместо событий он получает reset.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.overflowed = False
+        self._events = OrderedDict()
+        self._cond = threading.Condition()
+
+    def put(self, event):
+        with self._cond:
+            if self.overflowed:
+                return
+            key = event.get("key") or object()
+            self._events.pop(key, None)
+            self._events[key] = event
+            if len(self._events) > self.maxsize:
+                self._events.clear()
+                self.overflowed = True
+            self._cond.notify()
+
+    def get(self, timeout, coalesce=0):
+        """
+        Ждёт событий до timeout секунд, затем ещё coalesce секунд собирает
+        пачку — всплеск лайков уходит клиенту одним событием
+        """
+        with self._cond:
+            if not self._events and not self.overflowed:
+                self._cond.wait(timeout)
+            if self._events and coalesce:
+                deadline = time.monotonic() + coalesce
+                remaining = coalesce
+                while remaining > 0 and not self.overflowed:
+                    self._cond.wait(remaining)
+                    remaining = deadline - time.monotonic()
+            events = list(self._events.values())
+            self._events.clear()
+            return events
+
+
+class LocalBackend:
+    """Рассылка внутри процесса: хватает одного воркера (или flask run)"""
+
+    def __init__(self, deliver):
+        self.deliver = deliver
+
+    def publish(self, topic, event):
+        self.deliver(topic, event)
+
+    def start(self):
+        pass
+
+
+class RedisBackend:
+    """
+    Redis pub/sub (pip install redis): событие доходит до подписчиков во всех
+    воркерах gunicorn. Слушатель канала — поток в каждом процессе.
+    """
+
+    def __init__(self, deliver, url, prefix="events:"):
+        import redis
+        self.deliver = deliver
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def publish(self, topic, event):
+        self.client.publish(self.prefix + topic, json.dumps(event))
+
+    def start(self):
+        # После fork поток мастера в воркере не существует — заводим свой
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+            pubsub.psubscribe(self.prefix + "*")
+            threading.Thread(target=self._listen, args=(pubsub,), name="events-redis", daemon=True).start()
+            self._pid = os.getpid()
+
+    def _listen(self, pubsub):
+        for message in pubsub.listen():
+            topic = message["channel"].decode()[len(self.prefix):]
+            self.deliver(topic, json.loads(message["data"]))
+
+
+class EventBroker:
+    """
+    Pub/sub для Server-Sent Events. publish() после commit отправляет событие
+    в тему ("news:<id>"), stream() отдаёт открытым страницам поток text/event-stream.
+    Каждый открытый поток занимает поток воркера, поэтому их число ограничено
+    EVENTS_MAX_STREAMS (в config.py — четверть WEB_THREADS), а сам поток
+    закрывается через EVENTS_STREAM_TTL — браузер переподключается сам.
+    Сверх лимита — 503, и страница переходит на опрос /news/<id>/comments.
+    """
+
+    def __init__(self, app=None):
+        self.backend = None
+        self._topics = {}
+        self._lock = threading.Lock()
+        self._ids = count(1)
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("EVENTS_BACKEND", "local")
+        app.config.setdefault("EVENTS_REDIS_URL", "redis://localhost:6379/0")
+        app.config.setdefault("EVENTS_QUEUE_SIZE", 100)
+        app.config.setdefault("EVENTS_COALESCE_MS", 200)
+        app.config.setdefault("EVENTS_HEARTBEAT", 15)
+        app.config.setdefault("EVENTS_STREAM_TTL", 300)
+        app.config.setdefault("EVENTS_MAX_STREAMS", 1)
+
+        backend = app.config["EVENTS_BACKEND"]
+        if backend == "local":
+            self.backend = LocalBackend(self._deliver)
+        elif backend == "redis":
+            self.backend = RedisBackend(self._deliver, app.config["EVENTS_REDIS_URL"])
+        elif backend == "null":
+            self.backend = None
+        else:
+            raise ValueError(f"Неизвестный EVENTS_BACKEND: {backend}")
+        self.config = {name: app.config[name] for name in (
+            "EVENTS_QUEUE_SIZE", "EVENTS_COALESCE_MS", "EVENTS_HEARTBEAT",
+            "EVENTS_STREAM_TTL", "EVENTS_MAX_STREAMS")}
+        app.extensions["events"] = self
+
+    def publish(self, topic, name, data, key=None):
+        """key — события с одинаковым ключом заменяют друг друга, пока клиент их не прочитал"""
+        if self.backend is None:
+            return
+        event = {"event": name, "data": data}
+        if key:
+            event["key"] = key
+        try:
+            self.backend.publish(topic, event)
+        except Exception:
+            # Живые обновления необязательны: запись в базу уже прошла
+            pass
+
+    def _deliver(self, topic, event):
+        with self._lock:
+            subscriptions = list(self._topics.get(topic, ()))
+        for subscription in subscriptions:
+            subscription.put(event)
+
+    def subscribe(self, topic, limit=None):
+        """
+        limit — сколько потоков может быть открыто всего: проверка и подписка
+        идут под одной блокировкой, сверх лимита возвращается None
+        """
+        self.backend.start()
+        subscription = Subscription(self.config["EVENTS_QUEUE_SIZE"])
+        with self._lock:
+            if limit is not None and sum(len(subscriptions) for subscriptions in self._topics.values()) >= limit:
+                return None
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, topic, subscription):
+        with self._lock:
+            subscriptions = self._topics.get(topic)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._topics[topic]
+
+    def streams(self):
+        with self._lock:
+            return sum(len(subscriptions) for subscriptions in self._topics.values())
+
+    def _format(self, name, data):
+        return f"id: {next(self._ids)}\nevent: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    def stream(self, topic):
+        """Ответ text/event-stream для темы; без бэкенда или сверх лимита — 503"""
+        if self.backend is None:
+            return Response(status=503, headers={"Retry-After": "30"})
+        # Место занимается сразу, а не когда начнут читать тело: иначе одновременные
+        # запросы проходят проверку лимита все вместе
+        subscription = self.subscribe(topic, limit=self.config["EVENTS_MAX_STREAMS"])
+        if subscription is None:
+            return Response(status=503, headers={"Retry-After": "30"})
+
+        heartbeat = self.config["EVENTS_HEARTBEAT"]
+        coalesce = self.config["EVENTS_COALESCE_MS"] / 1000
+        ttl = self.config["EVENTS_STREAM_TTL"]
+
+        def generate():
+            try:
+                yield f"retry: {heartbeat * 1000}\n\n"
+                deadline = time.monotonic() + ttl
+                while time.monotonic() < deadline:
+                    events = subscription.get(heartbeat, coalesce)
+                    if subscription.overflowed:
+                        yield self._format("reset", {})
+                        return
+                    if not events:
+                        # Комментарий-пинг: прокси не закрывают соединение, а разрыв замечается
+                        yield ": ping\n\n"
+                    for event in events:
+                        yield self._format(event["event"], event["data"])
+            finally:
+                self.unsubscribe(topic, subscription)
+
+        response = Response(generate(), mimetype="text/event-stream",
+                            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+        # Ответ закрыли, так и не начав читать тело, — finally генератора не выполнится
+        response.call_on_close(lambda: self.unsubscribe(topic, subscription))
+        return response
+
+
+broker = EventBroker()
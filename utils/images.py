@@ -0,0 +1,123 @@
+import hashlib
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from flask import url_for
+
+
+AVATAR_DIR = "avatars"
+AVATAR_SIZES = (64, 160, 400)
+FORMATS = (("webp", "WEBP", {"quality": 80, "method": 4}),
+           ("jpg", "JPEG", {"quality": 85, "progressive": True, "optimize": True}))
+
+logger = logging.getLogger(__name__)
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="images")
+
+
+def is_avatar(profile_image):
+    return bool(profile_image) and profile_image.startswith(AVATAR_DIR + "/")
+
+
+def variant_name(digest, size, ext):
+    return f"{AVATAR_DIR}/{digest}-{size}.{ext}"
+
+
+def save_upload(file, upload_folder):
+    """
+    Потоково пишет загрузку во временный файл, считая sha256 по пути.
+    Возвращает (путь к временному файлу, хэш содержимого).
+    """
+    tmp_dir = os.path.join(upload_folder, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    tmp_path = os.path.join(tmp_dir, uuid.uuid4().hex)
+    digest = hashlib.sha256()
+    with open(tmp_path, "wb") as out:
+        for chunk in iter(lambda: file.stream.read(64 * 1024), b""):
+            digest.update(chunk)
+            out.write(chunk)
+    return tmp_path, digest.hexdigest()
+
+
+def verify_image(path):
+    """
+    Проверка до ответа на загрузку: структура файла (verify) и декодирование
+    в уменьшенном виде (draft — для JPEG это доли полного декодирования).
+    Обрезанный или битый файл отсекается здесь, а не в фоне.
+    """
+    from PIL import Image, UnidentifiedImageError
+    try:
+        with Image.open(path) as image:
+            if image.format not in ("PNG", "JPEG", "GIF", "WEBP"):
+                return False
+            image.verify()
+        with Image.open(path) as image:
+            image.draft("RGB", (AVATAR_SIZES[0], AVATAR_SIZES[0]))
+            image.load()
+        return True
+    except (UnidentifiedImageError, OSError, SyntaxError, ValueError, Image.DecompressionBombError):
+        return False
+
+
+def _make_variants(tmp_path, digest, upload_folder, on_done):
+    from PIL import Image, ImageOps
+    try:
+        os.makedirs(os.path.join(upload_folder, AVATAR_DIR), exist_ok=True)
+        with Image.open(tmp_path) as image:
+            image = ImageOps.exif_transpose(image).convert("RGB")
+            for size in AVATAR_SIZES:
+                thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+                for ext, fmt, options in FORMATS:
+                    target = os.path.join(upload_folder, variant_name(digest, size, ext))
+                    if os.path.exists(target):
+                        continue
+                    partial = f"{target}.{uuid.uuid4().hex}.part"
+                    thumb.save(partial, fmt, **options)
+                    os.replace(partial, target)
+    except Exception:
+        logger.exception("Не удалось обработать фото %s", digest)
+        return
+    finally:
+        try:
+            os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+    if on_done is not None:
+        try:
+            on_done()
+        except Exception:
+            logger.exception("Не удалось установить фото %s", digest)
+
+
+def process_avatar(tmp_path, digest, upload_folder, on_done=None):
+    """
+    Декодирование и ресайз — в фоновом пуле, запрос не ждёт.
+    on_done вызывается в том же потоке, когда все варианты уже на диске.
+    """
+    return _executor.submit(_make_variants, tmp_path, digest, upload_folder, on_done)
+
+
+def remove_avatar(profile_image, upload_folder):
+    """Удаляет файлы фото: все варианты для нового формата, сам файл — для старого"""
+    if not profile_image:
+        return
+    if is_avatar(profile_image):
+        digest = profile_image.split("/", 1)[1]
+        paths = [os.path.join(upload_folder, variant_name(digest, size, ext))
+                 for size in AVATAR_SIZES for ext, _, _ in FORMATS]
+    else:
+        paths = [os.path.join(upload_folder, profile_image)]
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def avatar_url(profile_image, size, ext="jpg"):
+    """URL наименьшего варианта не меньше size пикселей"""
+    if not is_avatar(profile_image):
+        return url_for("static", filename="uploads/" + profile_image)
+    digest = profile_image.split("/", 1)[1]
+    fit = next((s for s in AVATAR_SIZES if s >= size), AVATAR_SIZES[-1])
+    return url_for("static", filename="uploads/" + variant_name(digest, fit, ext))
@@ -0,0 +1,142 @@
+import json
+import logging
+import os
+import re
+import time
+from collections import defaultdict
+from flask import g, has_request_context, request
+from sqlalchemy import event
+
+
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_SPACES = re.compile(r"\s+")
+
+
+def statement_shape(statement):
+    """Текст запроса без разницы в длине IN (?, ?, ...) и пробелах"""
+    return _SPACES.sub(" ", _IN_LIST.sub("(?...)", statement)).strip()
+
+
+class RequestStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.shapes = defaultdict(lambda: [0, 0.0])
+
+    def record(self, statement, elapsed):
+        self.queries += 1
+        self.db_time += elapsed
+        shape = self.shapes[statement_shape(statement)]
+        shape[0] += 1
+        shape[1] += elapsed
+
+    def repeated(self, threshold):
+        """Одинаковые запросы, повторённые threshold+ раз — похоже на N+1"""
+        return [(shape, count) for shape, (count, _) in self.shapes.items() if count >= threshold]
+
+    def top(self, limit):
+        ranked = sorted(self.shapes.items(), key=lambda item: item[1][1], reverse=True)
+        return [{"statement": shape, "count": count, "ms": round(total * 1000, 2)}
+                for shape, (count, total) in ranked[:limit]]
+
+
+class SQLInstrumentation:
+    """
+    Число SQL-запросов и время в базе на каждый запрос:
+    - заголовок Server-Timing (db, app) — виден во вкладке Network браузера;
+    - предупреждение в лог, если один и тот же запрос повторился N_PLUS_ONE_THRESHOLD+ раз;
+    - запросы дольше SLOW_REQUEST_MS пишутся в ротируемый лог с самыми дорогими запросами.
+    Выключено (SQL_INSTRUMENTATION = False) — обработчики не регистрируются вовсе.
+    """
+
+    def __init__(self, app=None, db=None):
+        self.slow_log = None
+        self.enabled = False
+        if app is not None:
+            self.init_app(app, db)
+
+    def init_app(self, app, db):
+        app.config.setdefault("SQL_INSTRUMENTATION", False)
+        app.config.setdefault("SLOW_REQUEST_MS", 500)
+        app.config.setdefault("SLOW_REQUEST_LOG", os.path.join(app.instance_path, "slow_requests.log"))
+        app.config.setdefault("N_PLUS_ONE_THRESHOLD", 10)
+        app.config.setdefault("SQL_TOP_STATEMENTS", 5)
+        app.extensions["sql_instrumentation"] = self
+        if not app.config["SQL_INSTRUMENTATION"]:
+            return
+
+        self.app = app
+        self.enabled = True
+        self.slow_log = self._slow_logger(app.config["SLOW_REQUEST_LOG"])
+        with app.app_context():
+            for engine in db.engines.values():
+                self.instrument(engine)
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def instrument(self, engine):
+        """Считать запросы движка; асинхронный движок (utils/async_db.py) передаёт свой sync_engine"""
+        if not self.enabled:
+            return
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    @staticmethod
+    def _slow_logger(path):
+        from logging.handlers import RotatingFileHandler
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        logger = logging.getLogger("slow_requests")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if not any(getattr(h, "baseFilename", None) == os.path.abspath(path) for h in logger.handlers):
+            handler = RotatingFileHandler(path, maxBytes=5 * 1024 * 1024, backupCount=5, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        return logger
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        # Запросы из CLI и фоновых потоков не относятся ни к какому запросу
+        if has_request_context() and "sql_stats" in g:
+            g.sql_stats.record(statement, time.perf_counter() - started)
+
+    def _before_request(self):
+        g.sql_stats = RequestStats()
+
+    def _after_request(self, response):
+        stats = g.pop("sql_stats", None)
+        if stats is None:
+            return response
+        total_ms = (time.perf_counter() - stats.started) * 1000
+        db_ms = stats.db_time * 1000
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={db_ms:.1f};desc="{stats.queries} queries", app;dur={total_ms - db_ms:.1f}',
+        )
+
+        repeated = stats.repeated(self.app.config["N_PLUS_ONE_THRESHOLD"])
+        for shape, count in repeated:
+            self.app.logger.warning("Возможный N+1 в %s %s: %d раз %s",
+                                    request.method, request.path, count, shape[:200])
+
+        if total_ms >= self.app.config["SLOW_REQUEST_MS"]:
+            self.slow_log.info(json.dumps({
+                "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "method": request.method,
+                "path": request.full_path.rstrip("?"),
+                "endpoint": request.endpoint,
+                "status": response.status_code,
+                "total_ms": round(total_ms, 1),
+                "db_ms": round(db_ms, 1),
+                "queries": stats.queries,
+                "top_statements": stats.top(self.app.config["SQL_TOP_STATEMENTS"]),
+                "n_plus_one": [{"statement": shape, "count": count} for shape, count in repeated],
+            }, ensure_ascii=False))
+        return response
+
+
+sql_instrumentation = SQLInstrumentation()
@@ -0,0 +1,142 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
+
+
+def add_missing_columns(db):
+    """
+    Добавляет в существующие таблицы колонки, которых ещё нет в базе.
+    Возвращает список добавленных колонок в виде "таблица.колонка".
+    """
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    added = []
+
+    with db.engine.begin() as conn:
+        for table in db.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=db.engine.dialect)
+                ddl = f'ALTER TABLE "{table.name}" ADD COLUMN "{column.name}" {col_type}'
+                if column.server_default is not None:
+                    ddl += f" DEFAULT '{column.server_default.arg}'"
+                    if not column.nullable:
+                        ddl += " NOT NULL"
+                conn.execute(text(ddl))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def create_missing_indexes(db):
+    """
+    create_all не добавляет новые индексы в уже существующие таблицы.
+    Возвращает имена созданных индексов.
+    """
+    existing = set()
+    inspector = inspect(db.engine)
+    for table_name in inspector.get_table_names():
+        existing.update(index["name"] for index in inspector.get_indexes(table_name))
+
+    created = []
+    for table in db.metadata.sorted_tables:
+        for index in table.indexes:
+            if index.name in existing:
+                continue
+            index.create(db.engine, checkfirst=True)
+            created.append(index.name)
+    # Планировщику SQLite нужна статистика, чтобы выбрать новые индексы
+    if created and db.engine.dialect.name == "sqlite":
+        with db.engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+    return created
+
+
+def _foreign_keys(table):
+    return {(tuple(fk.column_keys), fk.referred_table.name, (fk.ondelete or "").upper())
+            for fk in table.foreign_key_constraints}
+
+
+def _reflected_foreign_keys(inspector, table_name):
+    return {(tuple(fk["constrained_columns"]), fk["referred_table"],
+             (fk.get("options", {}).get("ondelete") or "").upper())
+            for fk in inspector.get_foreign_keys(table_name)}
+
+
+def _remove_orphans(conn, table):
+    """Строки со ссылками в никуда: по правилу ON DELETE удаляем или обнуляем ссылку"""
+    for fk in table.foreign_key_constraints:
+        column = fk.column_keys[0]
+        parent, parent_column = fk.elements[0].column.table.name, fk.elements[0].column.name
+        orphan = (f'"{column}" IS NOT NULL AND "{column}" NOT IN '
+                  f'(SELECT "{parent_column}" FROM "{parent}")')
+        if (fk.ondelete or "").upper() == "SET NULL":
+            conn.execute(text(f'UPDATE "{table.name}" SET "{column}" = NULL WHERE {orphan}'))
+        else:
+            conn.execute(text(f'DELETE FROM "{table.name}" WHERE {orphan}'))
+
+
+def sync_foreign_keys(db):
+    """
+    SQLite не умеет менять внешние ключи существующей таблицы, поэтому таблицы,
+    где правила ON DELETE разошлись с моделями, пересоздаются: новая таблица,
+    копирование строк, удаление старой, переименование, индексы заново.
+    Заодно чистятся строки, ссылающиеся на удалённые записи. Возвращает имена таблиц.
+    """
+    if db.engine.dialect.name != "sqlite":
+        return []
+    inspector = inspect(db.engine)
+    existing_tables = set(inspector.get_table_names())
+    stale = [table for table in db.metadata.sorted_tables
+             if table.name in existing_tables
+             and _foreign_keys(table) != _reflected_foreign_keys(inspector, table.name)]
+    if not stale:
+        return []
+
+    with db.engine.connect() as conn:
+        # pysqlite сам не открывает транзакцию перед DDL — берём BEGIN/COMMIT на себя,
+        # чтобы пересоздание всех таблиц было атомарным
+        raw = conn.connection.driver_connection
+        isolation_level, raw.isolation_level = raw.isolation_level, None
+        # Вне транзакции: внутри неё PRAGMA foreign_keys игнорируется
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        conn.commit()
+        try:
+            with conn.begin():
+                conn.exec_driver_sql("BEGIN")
+                for table in stale:
+                    new_name = f"_new_{table.name}"
+                    ddl = str(CreateTable(table).compile(dialect=db.engine.dialect)).strip()
+                    ddl = ddl.replace(f"CREATE TABLE {table.name} ", f'CREATE TABLE "{new_name}" ', 1)
+                    conn.execute(text(ddl))
+                    old_columns = {col["name"] for col in inspector.get_columns(table.name)}
+                    columns = ", ".join(f'"{c.name}"' for c in table.columns if c.name in old_columns)
+                    conn.execute(text(f'INSERT INTO "{new_name}" ({columns}) SELECT {columns} FROM "{table.name}"'))
+                    conn.execute(text(f'DROP TABLE "{table.name}"'))
+                    conn.execute(text(f'ALTER TABLE "{new_name}" RENAME TO "{table.name}"'))
+                    for index in table.indexes:
+                        index.create(conn)
+                for table in db.metadata.sorted_tables:
+                    if table.name in existing_tables:
+                        _remove_orphans(conn, table)
+                violations = conn.exec_driver_sql("PRAGMA foreign_key_check").all()
+                if violations:
+                    raise RuntimeError(f"Нарушены внешние ключи: {violations[:10]}")
+        finally:
+            conn.exec_driver_sql("PRAGMA foreign_keys=ON")
+            conn.commit()
+            raw.isolation_level = isolation_level
+    return [table.name for table in stale]
+
+
+def upgrade_schema(db):
+    """
+    Создаёт недостающие таблицы, колонки и индексы, приводит внешние ключи к моделям.
+    Возвращает (колонки, индексы, пересозданные таблицы).
+    """
+    db.create_all()
+    columns = add_missing_columns(db)
+    rebuilt = sync_foreign_keys(db)
+    return columns, create_missing_indexes(db), rebuilt
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+from models import db, User
+from utils.stats import invalidate_dashboard_stats
+
+
+ACTIONS = {"approve": "approved", "reject": "rejected"}
+ROLES = ("student", "teacher", "admin")
+# SQLite ограничивает число параметров в запросе — длинные списки id идут частями
+ID_CHUNK = 500
+
+
+def parse_filters(source):
+    """
+    Фильтр очереди заявок из query-string/формы/JSON: role, group_id, course,
+    registered_from, registered_to (ГГГГ-ММ-ДД). Неверные значения отбрасываются.
+    """
+    filters = {}
+    if source.get("role") in ROLES:
+        filters["role"] = source["role"]
+    for name in ("group_id", "course"):
+        try:
+            filters[name] = int(source.get(name))
+        except (TypeError, ValueError):
+            pass
+    for name in ("registered_from", "registered_to"):
+        try:
+            filters[name] = datetime.strptime(str(source.get(name)), "%Y-%m-%d").date()
+        except ValueError:
+            pass
+    return filters
+
+
+def filter_args(filters):
+    """Фильтр обратно в параметры ссылки"""
+    return {name: value.isoformat() if hasattr(value, "isoformat") else value
+            for name, value in filters.items()}
+
+
+def _conditions(filters):
+    conditions = [User.status == "pending"]
+    if "role" in filters:
+        conditions.append(User.role == filters["role"])
+    if "group_id" in filters:
+        conditions.append(User.group_id == filters["group_id"])
+    if "course" in filters:
+        conditions.append(User.course == filters["course"])
+    if "registered_from" in filters:
+        conditions.append(User.created_at >= datetime.combine(filters["registered_from"], datetime.min.time()))
+    if "registered_to" in filters:
+        conditions.append(User.created_at < datetime.combine(filters["registered_to"] + timedelta(days=1),
+                                                             datetime.min.time()))
+    return conditions
+
+
+def pending_query(filters):
+    return User.query.filter(*_conditions(filters))
+
+
+def count_pending(filters):
+    return db.session.scalar(db.select(db.func.count(User.id)).where(*_conditions(filters)))
+
+
+def set_status(action, ids=None, filters=None):
+    """
+    Одобряет/отклоняет заявки одним UPDATE на пачку в одной транзакции.
+    ids — выбранные пользователи, иначе все, кто подходит под filters.
+    Трогаются только строки в статусе pending, поэтому повторный вызов
+    ничего не меняет.
+    Возвращает число обновлённых строк.
+    """
+    status = ACTIONS[action]
+    values = {User.status: status}
+    updated = 0
+    if ids is not None:
+        ids = sorted(set(ids))
+        for start in range(0, len(ids), ID_CHUNK):
+            chunk = ids[start:start + ID_CHUNK]
+            updated += User.query.filter(User.id.in_(chunk), User.status == "pending").update(
+                values, synchronize_session=False
+            )
+    else:
+        updated = User.query.filter(*_conditions(filters or {})).update(values, synchronize_session=False)
+    db.session.commit()
+    if updated:
+        invalidate_dashboard_stats()
+    return updated
@@ -0,0 +1,89 @@
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(created_at, id):
+    """Курсор = (created_at, id) последней строки, упакованный в url-safe строку"""
+    raw = f"{created_at.isoformat()}|{id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class KeysetPage:
+    def __init__(self, items, next_cursor, prev_cursor):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self):
+        return self.prev_cursor is not None
+
+
+def _keyset_query(query, created_col, id_col, per_page, after, before):
+    if before:
+        created_at, id = before
+        return (
+            query.filter(or_(created_col > created_at,
+                             and_(created_col == created_at, id_col > id)))
+            .order_by(created_col.asc(), id_col.asc())
+            .limit(per_page + 1)
+        )
+    if after:
+        created_at, id = after
+        query = query.filter(or_(created_col < created_at,
+                                 and_(created_col == created_at, id_col < id)))
+    return query.order_by(created_col.desc(), id_col.desc()).limit(per_page + 1)
+
+
+def _keyset_page(rows, per_page, after, before):
+    has_more = len(rows) > per_page
+    if before:
+        items = list(reversed(rows[:per_page]))
+        has_next, has_prev = True, has_more
+    else:
+        items = rows[:per_page]
+        has_next, has_prev = has_more, after is not None
+
+    next_cursor = prev_cursor = None
+    if items and has_next:
+        next_cursor = encode_cursor(items[-1].created_at, items[-1].id)
+    if items and has_prev:
+        prev_cursor = encode_cursor(items[0].created_at, items[0].id)
+    return KeysetPage(items, next_cursor, prev_cursor)
+
+
+def keyset_paginate(query, created_col, id_col, per_page, after=None, before=None):
+    """
+    Постраничная выборка "новые первыми" по ключу (created_at, id).
+    after  — курсор последней показанной строки, листаем к более старым;
+    before — курсор первой показанной строки, листаем к более новым.
+    Стоимость страницы зависит только от per_page, а не от размера таблицы.
+    """
+    after = decode_cursor(after)
+    before = decode_cursor(before)
+    rows = _keyset_query(query, created_col, id_col, per_page, after, before).all()
+    return _keyset_page(rows, per_page, after, before)
+
+
+async def keyset_paginate_async(session, statement, created_col, id_col, per_page, after=None, before=None):
+    """То же для AsyncSession: statement — select(Model) вместо Model.query"""
+    after = decode_cursor(after)
+    before = decode_cursor(before)
+    result = await session.scalars(_keyset_query(statement, created_col, id_col, per_page, after, before))
+    return _keyset_page(result.unique().all(), per_page, after, before)
@@ -0,0 +1,60 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHashBusy(Exception):
+    """Очередь на хэширование переполнена — запрос лучше отклонить, чем ждать"""
+
+
+_executor = None
+_slots = None
+_lock = threading.Lock()
+_canonical = {}
+
+
+def _pool():
+    # Ограниченный пул: одновременно хэшируется не больше PASSWORD_HASH_WORKERS паролей,
+    # остальные запросы ждут в очереди длиной PASSWORD_HASH_QUEUE
+    global _executor, _slots
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                workers = current_app.config.get("PASSWORD_HASH_WORKERS") or os.cpu_count() or 1
+                queue = current_app.config.get("PASSWORD_HASH_QUEUE", workers * 8)
+                _slots = threading.BoundedSemaphore(workers + queue)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+    return _executor
+
+
+def _run(fn, *args):
+    executor = _pool()
+    timeout = current_app.config.get("PASSWORD_HASH_TIMEOUT", 10)
+    if not _slots.acquire(timeout=timeout):
+        raise PasswordHashBusy()
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def hash_method():
+    """Настроенный метод в том виде, в каком он записывается в хэш (с параметрами по умолчанию)"""
+    method = current_app.config.get("PASSWORD_HASH_METHOD", "scrypt")
+    if method not in _canonical:
+        _canonical[method] = generate_password_hash("", method).split("$", 1)[0]
+    return _canonical[method]
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, hash_method())
+
+
+def verify_password(password_hash, password):
+    return _run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash):
+    return password_hash.split("$", 1)[0] != hash_method()
@@ -0,0 +1,180 @@
+import io
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from flask import current_app, g, request, session
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from utils.auth import get_current_user
+
+
+PARAM = "_profile"
+HEADER = "X-Profile"
+_NAME_CHARS = set("abcdefghijklmnopqrstuvwxyz0123456789-_.")
+
+
+def _short_path(filename):
+    # Для site-packages и стандартной библиотеки хватает последних частей пути
+    parts = filename.replace(os.sep, "/").split("/")
+    return "/".join(parts[-3:])
+
+
+class RequestProfiler:
+    """
+    cProfile для отдельных запросов: view вместе с рендером шаблона.
+    Запускается подписанным токеном админа (?_profile=<токен> или заголовок X-Profile)
+    либо выборочно — каждый PROFILE_SAMPLE_RATE-й запрос в среднем (0 — выключено).
+    Одновременно профилируется не больше одного запроса: остальные идут как обычно.
+    Результат — PROFILE_DIR/<имя>.prof (формат pstats) и <имя>.json с описанием запроса.
+    """
+
+    def __init__(self, app=None):
+        self._lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        app.config.setdefault("PROFILE_DIR", os.path.join(app.instance_path, "profiles"))
+        app.config.setdefault("PROFILE_SAMPLE_RATE", 0)
+        app.config.setdefault("PROFILE_TOKEN_TTL", 3600)
+        app.config.setdefault("PROFILE_KEEP", 200)
+        app.extensions["profiler"] = self
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    @staticmethod
+    def _serializer():
+        return URLSafeTimedSerializer(current_app.secret_key, salt="request-profiler")
+
+    def token(self, user_id):
+        return self._serializer().dumps(user_id)
+
+    def _requested_by_admin(self):
+        token = request.args.get(PARAM) or request.headers.get(HEADER)
+        if not token or session.get("role") != "admin":
+            return False
+        try:
+            user_id = self._serializer().loads(token, max_age=current_app.config["PROFILE_TOKEN_TTL"])
+        except BadSignature:
+            return False
+        # Та же проверка, что в admin_required: роль подтверждается пользователем из базы
+        user = get_current_user()
+        return user is not None and user.id == user_id and user.role == "admin"
+
+    def _trigger(self):
+        if self._requested_by_admin():
+            return "admin"
+        rate = current_app.config["PROFILE_SAMPLE_RATE"]
+        if rate and random.random() < 1 / rate:
+            return "sample"
+        return None
+
+    def _before_request(self):
+        if request.endpoint == "static":
+            return
+        trigger = self._trigger()
+        if trigger is None or not self._lock.acquire(blocking=False):
+            return
+        # cProfile и pstats нужны только при съёмке — не грузим их при старте воркера
+        import cProfile
+        profile = cProfile.Profile()
+        g.profiler = (profile, trigger, time.perf_counter())
+        try:
+            profile.enable()
+        except ValueError:
+            # Профилировщик уже запущен кем-то другим (отладчик, coverage)
+            g.pop("profiler")
+            self._lock.release()
+
+    def _after_request(self, response):
+        state = g.pop("profiler", None)
+        if state is None:
+            return response
+        profile, trigger, started = state
+        try:
+            profile.disable()
+            self._save(profile, trigger, (time.perf_counter() - started) * 1000, response.status_code)
+        finally:
+            self._lock.release()
+        response.headers["X-Profile-Captured"] = "1"
+        return response
+
+    def _teardown_request(self, exc):
+        # View упал до after_request — профиль не сохраняем, но блокировку освобождаем
+        state = g.pop("profiler", None)
+        if state is not None:
+            state[0].disable()
+            self._lock.release()
+
+    def _save(self, profile, trigger, duration_ms, status):
+        directory = current_app.config["PROFILE_DIR"]
+        os.makedirs(directory, exist_ok=True)
+        endpoint = (request.endpoint or "unknown").replace(".", "-")
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}_{endpoint}_{uuid.uuid4().hex[:6]}"
+        profile.dump_stats(os.path.join(directory, name + ".prof"))
+        meta = {
+            "name": name,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "method": request.method,
+            "path": request.path,
+            "endpoint": request.endpoint,
+            "status": status,
+            "duration_ms": round(duration_ms, 1),
+            "trigger": trigger,
+        }
+        with open(os.path.join(directory, name + ".json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        self._prune(directory, current_app.config["PROFILE_KEEP"])
+
+    @staticmethod
+    def _prune(directory, keep):
+        names = sorted(f[:-5] for f in os.listdir(directory) if f.endswith(".json"))
+        for name in names[:-keep] if keep else []:
+            for ext in (".prof", ".json"):
+                try:
+                    os.remove(os.path.join(directory, name + ext))
+                except FileNotFoundError:
+                    pass
+
+    def list(self):
+        """Описания сохранённых профилей, новые первыми"""
+        directory = current_app.config["PROFILE_DIR"]
+        if not os.path.isdir(directory):
+            return []
+        items = []
+        for filename in sorted(os.listdir(directory), reverse=True):
+            if filename.endswith(".json"):
+                with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                    items.append(json.load(f))
+        return items
+
+    def path(self, name):
+        """Путь к .prof по имени; None для чужих или несуществующих имён"""
+        if not name or not set(name) <= _NAME_CHARS:
+            return None
+        path = os.path.join(current_app.config["PROFILE_DIR"], name + ".prof")
+        return path if os.path.exists(path) else None
+
+    def top(self, name, limit=40, sort="cumulative"):
+        """Первые limit функций по sort и общее время профиля в мс"""
+        import pstats
+        stats = pstats.Stats(self.path(name), stream=io.StringIO())
+        stats.sort_stats(sort)
+        rows = []
+        for func in stats.fcn_list[:limit]:
+            primitive, calls, tottime, cumtime, _ = stats.stats[func]
+            filename, line, function = func
+            rows.append({
+                "calls": calls if calls == primitive else f"{calls}/{primitive}",
+                "tottime_ms": round(tottime * 1000, 2),
+                "cumtime_ms": round(cumtime * 1000, 2),
+                "location": f"{_short_path(filename)}:{line}",
+                "function": function,
+            })
+        return rows, round(stats.total_tt * 1000, 1)
+
+
+profiler = RequestProfiler()
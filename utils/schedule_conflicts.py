@@ -0,0 +1,151 @@
+import threading
+from bisect import bisect_left, insort
+from collections import namedtuple
+from models import db, Schedule, get_version, bump_version
+
+
+VERSION_NAME = "schedules"
+
+# Предлагаемая пара; id заполняется при редактировании, чтобы не конфликтовать с самой собой
+Slot = namedtuple(
+    "Slot",
+    "group_id course teacher_id weekday start_time end_time id",
+    defaults=(None,),
+)
+
+# kind: "group" или "teacher"; schedule_id — конфликтующая строка в базе,
+# batch_index — конфликтующая пара из той же пачки (для импорта)
+Conflict = namedtuple("Conflict", "kind schedule_id batch_index")
+
+
+def slot_from_schedule(schedule):
+    return Slot(schedule.group_id, schedule.course, schedule.teacher_id, schedule.weekday,
+                schedule.start_time, schedule.end_time, schedule.id)
+
+
+class ScheduleConflictIndex:
+    """
+    Интервальный индекс расписания: для каждого дня недели отсортированные
+    списки (start, end, id) по группе/курсу и по преподавателю.
+    Поиск пересечений — bisect по началу пары, без запросов к базе.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._slots = {}
+        self._by_group = {}
+        self._by_teacher = {}
+
+    @staticmethod
+    def _keys(slot):
+        group_key = (slot.weekday, slot.group_id, slot.course)
+        teacher_key = (slot.weekday, slot.teacher_id) if slot.teacher_id is not None else None
+        return group_key, teacher_key
+
+    def rebuild(self, slots, version):
+        self._slots = {}
+        self._by_group = {}
+        self._by_teacher = {}
+        for slot in slots:
+            self.add(slot)
+        self.version = version
+
+    def add(self, slot):
+        self._slots[slot.id] = slot
+        group_key, teacher_key = self._keys(slot)
+        item = (slot.start_time, slot.end_time, slot.id)
+        insort(self._by_group.setdefault(group_key, []), item)
+        if teacher_key:
+            insort(self._by_teacher.setdefault(teacher_key, []), item)
+
+    def remove(self, id):
+        slot = self._slots.pop(id, None)
+        if slot is None:
+            return
+        group_key, teacher_key = self._keys(slot)
+        item = (slot.start_time, slot.end_time, slot.id)
+        self._by_group[group_key].remove(item)
+        if teacher_key:
+            self._by_teacher[teacher_key].remove(item)
+
+    @staticmethod
+    def _overlapping(items, start_time, end_time, exclude_id):
+        # Кандидаты — все пары, начинающиеся раньше конца новой
+        hi = bisect_left(items, (end_time,))
+        return [id for start, end, id in items[:hi] if end > start_time and id != exclude_id]
+
+    def check(self, slots):
+        """
+        Проверяет пачку пар за один проход: против индекса и друг против друга.
+        Возвращает {номер пары в пачке: [Conflict, ...]} только для пар с конфликтами.
+        """
+        conflicts = {}
+        batch_group, batch_teacher = {}, {}
+        for i, slot in enumerate(slots):
+            found = []
+            group_key, teacher_key = self._keys(slot)
+
+            for id in self._overlapping(self._by_group.get(group_key, []),
+                                        slot.start_time, slot.end_time, slot.id):
+                found.append(Conflict("group", id, None))
+            for j in self._overlapping(batch_group.get(group_key, []),
+                                       slot.start_time, slot.end_time, None):
+                found.append(Conflict("group", None, j))
+
+            if teacher_key:
+                for id in self._overlapping(self._by_teacher.get(teacher_key, []),
+                                            slot.start_time, slot.end_time, slot.id):
+                    found.append(Conflict("teacher", id, None))
+                for j in self._overlapping(batch_teacher.get(teacher_key, []),
+                                           slot.start_time, slot.end_time, None):
+                    found.append(Conflict("teacher", None, j))
+
+            if found:
+                conflicts[i] = found
+            insort(batch_group.setdefault(group_key, []), (slot.start_time, slot.end_time, i))
+            if teacher_key:
+                insort(batch_teacher.setdefault(teacher_key, []), (slot.start_time, slot.end_time, i))
+        return conflicts
+
+
+_index = ScheduleConflictIndex()
+_lock = threading.Lock()
+
+
+def _ensure_fresh():
+    # Один запрос по первичному ключу; полная перестройка — только если расписание
+    # менял другой процесс
+    version = get_version(VERSION_NAME)
+    if _index.version != version:
+        rows = db.session.execute(
+            db.select(Schedule.group_id, Schedule.course, Schedule.teacher_id, Schedule.weekday,
+                      Schedule.start_time, Schedule.end_time, Schedule.id)
+        ).all()
+        _index.rebuild((Slot(*row) for row in rows), version)
+
+
+def find_conflicts(slots):
+    with _lock:
+        _ensure_fresh()
+        return _index.check(slots)
+
+
+def mark_changed():
+    """Вызывать в транзакции, меняющей Schedule, до commit. Возвращает новую версию."""
+    return bump_version(VERSION_NAME)
+
+
+def apply_changes(version, added=(), removed=()):
+    """
+    Вызывать после commit: переносит изменения в индекс процесса.
+    Если индекс отставал больше чем на одну версию, он перестроится при следующей проверке.
+    """
+    with _lock:
+        if _index.version != version - 1:
+            _index.version = None
+            return
+        for id in removed:
+            _index.remove(id)
+        for slot in added:
+            _index.add(slot)
+        _index.version = version
@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+from datetime import datetime
+from models import db, Group, Subject, User, Schedule
+from utils.schedule_conflicts import Slot, find_conflicts, mark_changed
+from utils.timetables import keys_for, touch
+
+
+FIELDS = ("group", "course", "subject", "teacher", "weekday", "start", "end")
+
+WEEKDAYS = {
+    "понедельник": 0, "вторник": 1, "среда": 2, "четверг": 3,
+    "пятница": 4, "суббота": 5, "воскресенье": 6,
+}
+
+
+def parse_file(stream, filename):
+    """Читает CSV или JSON (список объектов) с полями FIELDS"""
+    data = stream.read()
+    if isinstance(data, bytes):
+        data = data.decode("utf-8-sig")
+    if filename.lower().endswith(".json"):
+        rows = json.loads(data)
+        if not isinstance(rows, list):
+            raise ValueError("JSON должен содержать список занятий.")
+        return rows
+    return list(csv.DictReader(io.StringIO(data)))
+
+
+def _weekday(value):
+    value = str(value).strip().lower()
+    if value in WEEKDAYS:
+        return WEEKDAYS[value]
+    weekday = int(value)
+    if not 0 <= weekday <= 6:
+        raise ValueError
+    return weekday
+
+
+def _time(value):
+    return datetime.strptime(str(value).strip(), "%H:%M").time()
+
+
+def import_schedule(rows):
+    """
+    Проверяет и вставляет занятия одной транзакцией.
+    Имена групп, предметов и преподавателей разрешаются одним запросом на таблицу,
+    конфликты проверяются в памяти — и внутри файла, и с уже существующим расписанием.
+    Возвращает (число вставленных строк, [(номер строки, ошибка), ...]).
+    Если есть хоть одна ошибка, ничего не вставляется.
+    """
+    def names(field):
+        return {str(row.get(field, "")).strip() for row in rows}
+
+    groups = dict(db.session.execute(
+        db.select(Group.name, Group.id).where(Group.name.in_(names("group")))
+    ).all())
+    subjects = dict(db.session.execute(
+        db.select(Subject.name, Subject.id).where(Subject.name.in_(names("subject")))
+    ).all())
+    teachers = dict(db.session.execute(
+        db.select(User.username, User.id)
+        .where(User.role == "teacher", User.username.in_(names("teacher")))
+    ).all())
+
+    errors = []
+    slots, values, line_numbers = [], [], []
+    # Номера строк как в файле: для CSV первая строка — заголовок
+    for line, row in enumerate(rows, start=2):
+        missing = [field for field in FIELDS if not str(row.get(field, "")).strip()]
+        if missing:
+            errors.append((line, f"Не заполнены поля: {', '.join(missing)}."))
+            continue
+
+        group_id = groups.get(str(row["group"]).strip())
+        subject_id = subjects.get(str(row["subject"]).strip())
+        teacher_id = teachers.get(str(row["teacher"]).strip())
+        if group_id is None:
+            errors.append((line, f"Группа «{row['group']}» не найдена."))
+            continue
+        if subject_id is None:
+            errors.append((line, f"Предмет «{row['subject']}» не найден."))
+            continue
+        if teacher_id is None:
+            errors.append((line, f"Преподаватель «{row['teacher']}» не найден."))
+            continue
+
+        try:
+            course = int(row["course"])
+            weekday = _weekday(row["weekday"])
+            start_time = _time(row["start"])
+            end_time = _time(row["end"])
+        except ValueError:
+            errors.append((line, "Некорректный курс, день недели или формат времени."))
+            continue
+        if course not in (1, 2, 3, 4):
+            errors.append((line, "Курс должен быть 1, 2, 3 или 4."))
+            continue
+        if start_time >= end_time:
+            errors.append((line, "Время начала должно быть раньше времени окончания."))
+            continue
+
+        slots.append(Slot(group_id, course, teacher_id, weekday, start_time, end_time))
+        values.append(dict(
+            group_id = group_id,
+            subject_id = subject_id,
+            teacher_id = teacher_id,
+            course = course,
+            weekday = weekday,
+            start_time = start_time,
+            end_time = end_time,
+        ))
+        line_numbers.append(line)
+
+    for i, conflicts in find_conflicts(slots).items():
+        for conflict in conflicts:
+            who = "группы/курса" if conflict.kind == "group" else "преподавателя"
+            if conflict.batch_index is not None:
+                errors.append((line_numbers[i],
+                               f"Конфликт {who} со строкой {line_numbers[conflict.batch_index]}."))
+            else:
+                errors.append((line_numbers[i],
+                               f"Конфликт {who} с существующим занятием #{conflict.schedule_id}."))
+
+    if errors or not values:
+        return 0, sorted(errors)
+
+    try:
+        # Один executemany в одной транзакции
+        db.session.execute(db.insert(Schedule), values)
+        touch(*[key for slot in slots for key in keys_for(slot)])
+        mark_changed()
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return len(values), []
@@ -0,0 +1,262 @@
+"""
+Полнотекстовый поиск по новостям и комментариям.
+
+На SQLite используется виртуальная таблица FTS5 search_index: строка новости
+хранится с rowid = news.id, строка комментария — с rowid = -comments.id,
+так что точечные обновления идут по rowid без сканирования. Токенизатор
+unicode61 приводит кириллицу к нижнему регистру, но его remove_diacritics
+знает только латиницу — ё заменяем на е сами, и в тексте, и в запросе;
+стемминга в FTS5 нет, поэтому каждое слово запроса ищется как префикс
+("экзамен" найдёт "экзамены", "экзаменов").
+На других движках (или без FTS5) — запасной вариант через LIKE.
+"""
+
+import base64
+import re
+from markupsafe import Markup, escape
+from sqlalchemy import column, delete, insert, literal, or_, select, table, text
+from sqlalchemy.orm import joinedload
+from models import db, News, Comments
+from utils.pagination import KeysetPage, keyset_paginate
+
+
+FTS_TABLE = "search_index"
+TITLE_WEIGHT, BODY_WEIGHT = 10.0, 1.0
+# Совпадение в комментарии весит меньше совпадения в самой новости
+COMMENT_FACTOR = 0.5
+MAX_TERMS = 8
+SNIPPET_TOKENS = 16
+MARK_START, MARK_END = "\x02", "\x03"
+
+search_index = table(FTS_TABLE, column("rowid"), column("title"), column("body"), column("news_id"))
+
+_available = {}
+
+
+def fold(value):
+    return value.replace("ё", "е").replace("Ё", "Е")
+
+
+def _fold_sql(column):
+    return db.func.replace(db.func.replace(column, "ё", "е"), "Ё", "Е")
+
+
+def available():
+    """Есть ли в текущей базе таблица FTS5 (проверяется один раз на процесс)"""
+    key = str(db.engine.url)
+    if key not in _available:
+        if db.engine.dialect.name != "sqlite":
+            _available[key] = False
+        else:
+            _available[key] = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE},
+            ).first() is not None
+    return _available[key]
+
+
+def create_index(db):
+    """
+    Создаёт таблицу FTS5, если её нет, и заполняет по существующим данным.
+    Возвращает True, если индекс был создан.
+    """
+    if db.engine.dialect.name != "sqlite":
+        return False
+    with db.engine.begin() as conn:
+        if conn.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+        ).first():
+            return False
+        options = conn.exec_driver_sql("PRAGMA compile_options").scalars().all()
+        if "ENABLE_FTS5" not in options:
+            return False
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5("
+            "title, body, news_id UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+    _available.pop(str(db.engine.url), None)
+    rebuild()
+    return True
+
+
+def rebuild():
+    """Полная переиндексация: очистить и залить новости и комментарии заново"""
+    db.session.execute(delete(search_index))
+    db.session.execute(insert(search_index).from_select(
+        ["rowid", "title", "body", "news_id"],
+        select(News.id, _fold_sql(News.title), _fold_sql(News.content), News.id),
+    ))
+    db.session.execute(insert(search_index).from_select(
+        ["rowid", "title", "body", "news_id"],
+        select(-Comments.id, literal(""), _fold_sql(Comments.content), Comments.news_id),
+    ))
+    db.session.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+    db.session.commit()
+    return db.session.scalar(select(db.func.count()).select_from(search_index))
+
+
+# Точечные обновления выполняются в транзакции вызывающего маршрута
+# и фиксируются вместе с его изменениями
+
+def index_news(news):
+    if not available():
+        return
+    db.session.execute(delete(search_index).where(search_index.c.rowid == news.id))
+    db.session.execute(insert(search_index).values(
+        rowid=news.id, title=fold(news.title), body=fold(news.content), news_id=news.id
+    ))
+
+
+def index_comment(comment):
+    if not available():
+        return
+    db.session.execute(insert(search_index).values(
+        rowid=-comment.id, title="", body=fold(comment.content), news_id=comment.news_id
+    ))
+
+
+def remove_news(news_ids):
+    """Убирает новости и их комментарии; вызывать до удаления самих строк"""
+    if not available():
+        return
+    news_ids = select(News.id).where(News.id.in_(news_ids))
+    db.session.execute(delete(search_index).where(or_(
+        search_index.c.rowid.in_(news_ids),
+        search_index.c.rowid.in_(select(-Comments.id).where(Comments.news_id.in_(news_ids))),
+    )))
+
+
+def remove_comments(comment_ids):
+    """comment_ids — список id или select по Comments.id"""
+    if not available():
+        return
+    db.session.execute(delete(search_index).where(
+        search_index.c.rowid.in_(select(-Comments.id).where(Comments.id.in_(comment_ids)))
+    ))
+
+
+def match_expression(query):
+    """Слова запроса → выражение FTS5: все слова обязательны, каждое как префикс"""
+    terms = re.findall(r"\w+", fold(query.lower()))[:MAX_TERMS]
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+
+def _highlight(snippet):
+    # Маркеры — управляющие символы, поэтому сам текст экранируется целиком
+    return Markup(str(escape(snippet)).replace(MARK_START, "<mark>").replace(MARK_END, "</mark>"))
+
+
+def _encode(score, id):
+    return base64.urlsafe_b64encode(f"{score!r}|{id}".encode()).decode().rstrip("=")
+
+
+def _decode(cursor):
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        score, id = base64.urlsafe_b64decode(padded.encode()).decode().split("|")
+        return float(score), int(id)
+    except (ValueError, UnicodeDecodeError):
+        return None
+
+
+class SearchHit:
+    def __init__(self, news, snippet):
+        self.news = news
+        self.snippet = snippet
+
+
+def search(query, per_page, after=None):
+    """
+    Возвращает KeysetPage из SearchHit, лучшие совпадения первыми.
+    after — курсор последнего показанного результата.
+    """
+    expression = match_expression(query)
+    if not expression:
+        return KeysetPage([], None, None)
+    if available():
+        return _search_fts(expression, per_page, _decode(after))
+    return _search_like(query.strip(), per_page, after)
+
+
+_FTS_SQL = f"""
+WITH hits AS MATERIALIZED (
+    SELECT rowid AS hit, news_id,
+           bm25({FTS_TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT})
+               * (CASE WHEN rowid < 0 THEN {COMMENT_FACTOR} ELSE 1.0 END) AS score
+    FROM {FTS_TABLE}
+    WHERE {FTS_TABLE} MATCH :expression
+), best AS (
+    SELECT news_id, MIN(score) AS score, hit FROM hits GROUP BY news_id
+), page AS MATERIALIZED (
+    SELECT news_id, score, hit FROM best
+    WHERE :score IS NULL OR score > :score OR (score = :score AND news_id < :id)
+    ORDER BY score ASC, news_id DESC
+    LIMIT :limit
+)
+SELECT page.news_id, page.score,
+       snippet({FTS_TABLE}, -1, :mark_start, :mark_end, '…', {SNIPPET_TOKENS}) AS snippet
+FROM page CROSS JOIN {FTS_TABLE}
+WHERE {FTS_TABLE}.rowid = page.hit AND {FTS_TABLE} MATCH :expression
+ORDER BY page.score ASC, page.news_id DESC
+"""
+
+
+def _search_fts(expression, per_page, after):
+    # bm25 отрицателен: чем меньше, тем релевантнее. При MIN() SQLite берёт
+    # rowid из той же строки, что дала лучший балл. Сначала ранжирование и
+    # LIMIT по одному bm25, snippet() — только для per_page + 1 оставшихся строк
+    # (поиск по rowid с тем же MATCH). MATERIALIZED не даёт планировщику
+    # развернуть подзапросы — bm25/snippet работают только внутри MATCH
+    score, id = after or (None, None)
+    rows = db.session.execute(text(_FTS_SQL), {
+        "expression": expression, "mark_start": MARK_START, "mark_end": MARK_END,
+        "score": score, "id": id, "limit": per_page + 1,
+    }).all()
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+
+    news_by_id = {
+        item.id: item
+        for item in News.query.options(joinedload(News.author))
+        .filter(News.id.in_([row.news_id for row in rows]))
+    }
+    items = [SearchHit(news_by_id[row.news_id], _highlight(row.snippet))
+             for row in rows if row.news_id in news_by_id]
+    next_cursor = _encode(rows[-1].score, rows[-1].news_id) if has_more else None
+    return KeysetPage(items, next_cursor, None)
+
+
+def _like_snippet(text_value, term, width=80):
+    position = text_value.lower().find(term.lower())
+    if position < 0:
+        return None
+    start = max(0, position - width // 2)
+    end = min(len(text_value), position + len(term) + width // 2)
+    fragment = ("…" if start else "") + text_value[start:position] + MARK_START \
+        + text_value[position:position + len(term)] + MARK_END \
+        + text_value[position + len(term):end] + ("…" if end < len(text_value) else "")
+    return _highlight(fragment)
+
+
+def _search_like(query, per_page, after):
+    # Без FTS: подстрока целиком, новые первыми. Полный просмотр таблицы — только запасной путь
+    pattern = "%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    matching_comments = select(Comments.news_id).where(Comments.content.ilike(pattern, escape="\\"))
+    page = keyset_paginate(
+        News.query.options(joinedload(News.author)).filter(or_(
+            News.title.ilike(pattern, escape="\\"),
+            News.content.ilike(pattern, escape="\\"),
+            News.id.in_(matching_comments),
+        )),
+        News.created_at, News.id, per_page=per_page, after=after,
+    )
+    page.items = [
+        SearchHit(item, _like_snippet(item.content, query) or _like_snippet(item.title, query)
+                  or escape(item.content[:100]))
+        for item in page.items
+    ]
+    page.prev_cursor = None
+    return page
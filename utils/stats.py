@@ -0,0 +1,29 @@
+from models import db, User, Group, Subject, News
+from utils.cache import MemoryBackend
+
+
+_cache = MemoryBackend(maxsize=8)
+
+
+def dashboard_stats(ttl=30):
+    """
+    Счётчики админ-панели одним запросом из скалярных подзапросов,
+    результат держится в памяти процесса ttl секунд.
+    """
+    stats = _cache.get("dashboard")
+    if stats is None:
+        row = db.session.execute(db.select(
+            db.select(db.func.count(User.id)).scalar_subquery().label("users_count"),
+            db.select(db.func.count(Group.id)).scalar_subquery().label("groups_count"),
+            db.select(db.func.count(Subject.id)).scalar_subquery().label("subjects_count"),
+            db.select(db.func.count(News.id)).scalar_subquery().label("news_count"),
+            db.select(db.func.count(User.id)).where(User.status == "pending")
+            .scalar_subquery().label("pending_count"),
+        )).one()
+        stats = row._asdict()
+        _cache.set("dashboard", stats, ttl)
+    return stats
+
+
+def invalidate_dashboard_stats():
+    _cache.delete("dashboard")
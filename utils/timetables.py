@@ -0,0 +1,208 @@
+import json
+from collections import namedtuple
+from datetime import date, datetime, timedelta
+from itsdangerous import URLSafeSerializer, BadSignature
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from models import db, Group, Subject, User, Schedule, DataVersion, Timetable, bump_version
+
+
+# Общая версия всех расписаний: меняется при переименовании групп/предметов
+# и удалении преподавателей — их имена сохранены внутри готовых расписаний
+EPOCH_NAME = "timetables"
+
+TimetableEntry = namedtuple(
+    "TimetableEntry",
+    "id weekday start_time end_time subject_name teacher_name group_name course",
+)
+
+
+def group_key(group_id, course):
+    return f"group:{group_id}:{course}"
+
+
+def teacher_key(teacher_id):
+    return f"teacher:{teacher_id}"
+
+
+def keys_for(slot):
+    keys = [group_key(slot.group_id, slot.course)]
+    if slot.teacher_id is not None:
+        keys.append(teacher_key(slot.teacher_id))
+    return keys
+
+
+def touch(*keys):
+    """Вызывать в транзакции, меняющей Schedule: помечает расписания устаревшими"""
+    for key in set(keys):
+        bump_version(f"timetable:{key}")
+
+
+def touch_all():
+    bump_version(EPOCH_NAME)
+
+
+def _versions_statement(key):
+    return (db.select(DataVersion.name, DataVersion.version)
+            .where(DataVersion.name.in_((f"timetable:{key}", EPOCH_NAME))))
+
+
+def _version_string(key, rows):
+    versions = dict(rows)
+    return f"{versions.get(f'timetable:{key}', 0)}.{versions.get(EPOCH_NAME, 0)}"
+
+
+def current_version(key):
+    """Версия расписания одним запросом: "<версия ключа>.<общая версия>" """
+    return _version_string(key, db.session.execute(_versions_statement(key)).all())
+
+
+def _build_statement(key):
+    query = (
+        db.select(Schedule.id, Schedule.weekday, Schedule.start_time, Schedule.end_time,
+                  Subject.name, User.username, Group.name, Schedule.course)
+        .join(Subject, Schedule.subject_id == Subject.id)
+        .join(Group, Schedule.group_id == Group.id)
+        .outerjoin(User, Schedule.teacher_id == User.id)
+        .order_by(Schedule.weekday, Schedule.start_time)
+    )
+    kind, *ids = key.split(":")
+    if kind == "group":
+        return query.where(Schedule.group_id == int(ids[0]), Schedule.course == int(ids[1]))
+    return query.where(Schedule.teacher_id == int(ids[0]))
+
+
+def _dump(result):
+    rows = [
+        [id, weekday, start.strftime("%H:%M"), end.strftime("%H:%M"), subject, teacher, group, course]
+        for id, weekday, start, end, subject, teacher, group, course in result
+    ]
+    return json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+
+
+def _build(key):
+    return _dump(db.session.execute(_build_statement(key)))
+
+
+def _load(data):
+    return [
+        TimetableEntry(id, weekday,
+                       datetime.strptime(start, "%H:%M").time(),
+                       datetime.strptime(end, "%H:%M").time(),
+                       subject, teacher, group, course)
+        for id, weekday, start, end, subject, teacher, group, course in json.loads(data)
+    ]
+
+
+def get_timetable(key, version=None):
+    """
+    Возвращает (версия, [TimetableEntry, ...]).
+    Расписание пересобирается, только если его версия изменилась с прошлой сборки.
+    """
+    version = version or current_version(key)
+    timetable = db.session.get(Timetable, key)
+    if timetable is None or timetable.version != version:
+        data = _build(key)
+        _save(key, version, data)
+        return version, _load(data)
+    return version, _load(timetable.data)
+
+
+def _save(key, version, data):
+    """
+    Готовое расписание пишется в отдельной сессии: commit в сессии запроса
+    сбросил бы уже загруженные страницей объекты, и шаблон перечитывал бы их по одному
+    """
+    with Session(db.engine) as session:
+        session.merge(Timetable(key=key, version=version, data=data))
+        try:
+            session.commit()
+        except IntegrityError:
+            # Параллельный запрос уже сохранил это же расписание
+            session.rollback()
+
+
+async def current_version_async(session, key):
+    return _version_string(key, (await session.execute(_versions_statement(key))).all())
+
+
+async def get_timetable_async(session, key, version=None):
+    """get_timetable для AsyncSession"""
+    version = version or await current_version_async(session, key)
+    timetable = await session.get(Timetable, key)
+    if timetable is None or timetable.version != version:
+        data = _dump(await session.execute(_build_statement(key)))
+        if timetable is None:
+            timetable = Timetable(key=key)
+            session.add(timetable)
+        timetable.version = version
+        timetable.data = data
+        try:
+            await session.commit()
+        except IntegrityError:
+            await session.rollback()
+        return version, _load(data)
+    return version, _load(timetable.data)
+
+
+def etag_for(key, version):
+    return f"tt-{key.replace(':', '-')}-{version}"
+
+
+def _serializer():
+    return URLSafeSerializer(current_app.secret_key, salt="timetable-feed")
+
+
+def feed_token(key):
+    """Подпись для ссылки на .ics: календарь опрашивает ленту без входа на сайт"""
+    return _serializer().dumps(key)
+
+
+def check_feed_token(key, token):
+    try:
+        return _serializer().loads(token) == key
+    except BadSignature:
+        return False
+
+
+def _ics_escape(text):
+    return (str(text).replace("\\", "\\\\").replace(";", "\\;")
+            .replace(",", "\\,").replace("\n", "\\n"))
+
+
+def to_ics(entries, name, semester_start):
+    """Еженедельно повторяющиеся события, начиная с первой недели семестра"""
+    stamp = datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    lines = [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//Finance & Economy//Timetable//RU",
+        "CALSCALE:GREGORIAN",
+        f"X-WR-CALNAME:{_ics_escape(name)}",
+    ]
+    for entry in entries:
+        day = semester_start + timedelta(days=(entry.weekday - semester_start.weekday()) % 7)
+        start = datetime.combine(day, entry.start_time)
+        end = datetime.combine(day, entry.end_time)
+        summary = entry.subject_name
+        description = f"{entry.group_name} ({entry.course} курс)"
+        if entry.teacher_name:
+            description += f", {entry.teacher_name}"
+        lines += [
+            "BEGIN:VEVENT",
+            f"UID:schedule-{entry.id}@facultet",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{start.strftime('%Y%m%dT%H%M%S')}",
+            f"DTEND:{end.strftime('%Y%m%dT%H%M%S')}",
+            "RRULE:FREQ=WEEKLY",
+            f"SUMMARY:{_ics_escape(summary)}",
+            f"DESCRIPTION:{_ics_escape(description)}",
+            "END:VEVENT",
+        ]
+    lines.append("END:VCALENDAR")
+    return "\r\n".join(lines) + "\r\n"
+
+
+def parse_semester_start(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
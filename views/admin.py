@@ -0,0 +1,311 @@
+from flask import Blueprint, current_app, redirect, render_template, url_for, request, flash, abort, jsonify, send_file
+from sqlalchemy.orm import joinedload, selectinload
+from models import db, Group, Subject, User, News
+from utils.auth import admin_required, get_current_user
+from utils.pagination import keyset_paginate
+from utils.schedule_conflicts import mark_changed
+from utils import timetables, moderation
+from utils.stats import dashboard_stats, invalidate_dashboard_stats
+from utils.profiler import profiler
+
+bp = Blueprint("admin", __name__)
+
+
+@bp.route("/admin")
+@admin_required
+def admin():
+    current_user = get_current_user()
+
+    # Статистика: один агрегирующий запрос, кэшируется на ADMIN_STATS_TTL секунд
+    stats = dashboard_stats(current_app.config["ADMIN_STATS_TTL"])
+
+    # Ожидающие пользователи (ждут подтверждения) — постранично, с фильтром
+    filters = moderation.parse_filters(request.args)
+    pending_page = keyset_paginate(
+        moderation.pending_query(filters).options(joinedload(User.group)),
+        User.created_at, User.id,
+        per_page=current_app.config["PENDING_PER_PAGE"],
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+    )
+
+    # Последние новости
+    latest_news = News.query.options(joinedload(News.author)).order_by(News.created_at.desc()).limit(5).all()
+
+    return render_template(
+        "admin.html",
+        user=current_user,
+        pending_users=pending_page.items,
+        pending_page=pending_page,
+        filters=moderation.filter_args(filters),
+        matching_count=moderation.count_pending(filters) if filters else stats["pending_count"],
+        groups=Group.query.order_by(Group.name).all(),
+        latest_news=latest_news,
+        **stats
+    )
+
+
+@bp.route("/admin/profiles")
+@admin_required
+def admin_profiles():
+    current_user = get_current_user()
+    return render_template(
+        "admin_profiles.html",
+        profiles=profiler.list(),
+        token=profiler.token(current_user.id),
+        sample_rate=current_app.config["PROFILE_SAMPLE_RATE"],
+    )
+
+
+@bp.route("/admin/profiles/<name>")
+@admin_required
+def admin_profile(name):
+    if profiler.path(name) is None:
+        abort(404)
+    sort = request.args.get("sort", "cumulative")
+    if sort not in ("cumulative", "tottime", "calls"):
+        sort = "cumulative"
+    rows, total_ms = profiler.top(name, sort=sort)
+    meta = next((item for item in profiler.list() if item["name"] == name), {"name": name})
+    return render_template("admin_profile.html", meta=meta, rows=rows, total_ms=total_ms, sort=sort)
+
+
+@bp.route("/admin/profiles/<name>/download")
+@admin_required
+def download_profile(name):
+    path = profiler.path(name)
+    if path is None:
+        abort(404)
+    # Файл pstats: открывается python -m pstats, snakeviz и т.п.
+    return send_file(path, as_attachment=True, download_name=name + ".prof")
+
+
+@bp.route("/admin/update_status", methods = ["POST"])
+@admin_required
+def admin_update_status():
+    user_id = request.form.get("user_id", type=int)
+    action = request.form.get("action")
+    if action not in moderation.ACTIONS:
+        flash("Некорректное действие!", "error")
+        return redirect(url_for("admin.admin"))
+
+    try:
+        if moderation.set_status(action, ids=[user_id] if user_id else []):
+            flash("Пользователь успешно одобрен." if action == "approve" else "Пользователь успешно отклонён.")
+        else:
+            flash("Заявка не найдена или уже обработана.")
+    except Exception as e: 
+        db.session.rollback()
+        flash(f"Ошибка при обновлении: {str(e)}", "error")
+
+    return redirect(url_for("admin.admin"))
+
+
+@bp.route("/admin/users/bulk_status", methods = ["POST"])
+@admin_required
+def admin_bulk_status():
+    action = request.form.get("action")
+    filters = moderation.parse_filters(request.form)
+    back = url_for("admin.admin", **moderation.filter_args(filters))
+    if action not in moderation.ACTIONS:
+        flash("Некорректное действие!", "error")
+        return redirect(back)
+
+    try:
+        # scope=filter — все заявки под текущим фильтром, иначе только отмеченные
+        if request.form.get("scope") == "filter":
+            updated = moderation.set_status(action, filters=filters)
+        else:
+            ids = request.form.getlist("user_ids", type=int)
+            if not ids:
+                flash("Не выбрано ни одной заявки.", "error")
+                return redirect(back)
+            updated = moderation.set_status(action, ids=ids)
+        verb = "одобрено" if action == "approve" else "отклонено"
+        flash(f"Заявок {verb}: {updated}.", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Ошибка при обновлении: {str(e)}", "error")
+    return redirect(back)
+
+
+@bp.route("/admin/api/users/status", methods = ["POST"])
+@admin_required
+def admin_api_users_status():
+    """
+    {"action": "approve"|"reject", "ids": [1, 2, ...]} или
+    {"action": ..., "filter": {"role": ..., "group_id": ..., "course": ..., "registered_from": ..., "registered_to": ...}}.
+    Меняются только заявки в статусе pending — повтор того же запроса безопасен.
+    """
+    payload = request.get_json(silent=True) or {}
+    action = payload.get("action")
+    if action not in moderation.ACTIONS:
+        return jsonify(error="action должен быть approve или reject"), 400
+
+    ids = payload.get("ids")
+    if ids is not None:
+        if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+            return jsonify(error="ids должен быть списком целых чисел"), 400
+        updated = moderation.set_status(action, ids=ids)
+        return jsonify(status=moderation.ACTIONS[action], requested=len(set(ids)),
+                       updated=updated, unchanged=len(set(ids)) - updated)
+
+    if not isinstance(payload.get("filter"), dict):
+        return jsonify(error="нужен ids или filter"), 400
+    filters = moderation.parse_filters(payload["filter"])
+    if not filters:
+        # Пустой фильтр означал бы "все заявки" — такое только явным образом
+        if not payload.get("all"):
+            return jsonify(error="пустой фильтр: передайте \"all\": true, чтобы обработать все заявки"), 400
+    updated = moderation.set_status(action, filters=filters)
+    return jsonify(status=moderation.ACTIONS[action], filter=moderation.filter_args(filters), updated=updated)
+
+
+@bp.route("/admin/groups", methods = ["POST", "GET"])
+@admin_required
+def admin_groups():
+    if request.method == "POST":
+        name = request.form.get("name")
+        course = request.form.get("course")
+
+        if not name or not course:
+            flash("Заполните все поля!", "danger")
+            return redirect(url_for("admin.admin_groups"))
+        
+        try:
+            group = Group(name = name, course = int(course))
+            db.session.add(group)
+            db.session.commit()
+            invalidate_dashboard_stats()
+            flash("Группа успешно добавлена!", "success")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Ошибка при добавлении группы: {str(e)}", "danger")
+        
+        return redirect(url_for("admin.admin_groups"))
+    
+    groups = Group.query.all()
+    return render_template("admin_groups.html", groups = groups)
+
+
+@bp.route("/admin/edit_group/<int:id>", methods=["GET", "POST"])
+@admin_required
+def edit_group(id):
+    group = Group.query.get_or_404(id)
+
+    if request.method == "POST":
+        group.name = request.form.get("name")
+        group.course = request.form.get("course")
+        try:
+            timetables.touch_all()
+            db.session.commit()
+            flash("Группа успешно обновлена!", "success")
+            return redirect(url_for("admin.admin_groups"))
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Ошибка при обновлении группы: {str(e)}", "error")
+
+    return render_template("edit_group.html", group=group)
+
+
+@bp.route("/admin/groups/delete/<int:id>", methods=["POST", "GET"])
+@admin_required
+def delete_group(id):
+    Group.query.get_or_404(id)
+    try:
+        # Занятия группы удаляет ON DELETE CASCADE, у студентов group_id становится NULL
+        db.session.execute(db.delete(Group).where(Group.id == id))
+        mark_changed()
+        timetables.touch_all()
+        db.session.commit()
+        invalidate_dashboard_stats()
+        flash("Группа успешно удалена!", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Ошибка при удалении группы: {str(e)}", "error")
+    return redirect(url_for("admin.admin_groups"))
+
+
+@bp.route("/admin/subjects", methods = ["POST", "GET"])
+@admin_required
+def admin_subjects():
+    teachers = User.query.filter_by(role = "teacher").all()
+    subjects = Subject.query.options(selectinload(Subject.teachers)).all()
+
+    if request.method == "POST":
+        name = request.form.get("name")
+        teacher_ids = request.form.getlist("teachers")
+
+        if not name:
+            flash("Введите название предмета", "error")
+            return redirect(url_for("admin.admin_subjects"))
+
+        try:
+            subject = Subject(name = name)
+            selected_teachers = User.query.filter(User.id.in_(teacher_ids)).all()
+            subject.teachers = selected_teachers
+
+            db.session.add(subject)
+            db.session.commit()
+            invalidate_dashboard_stats()
+            flash("Предмет успешно добавлен.", "success")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Произошло ошибка при добавлении {str(e)}.")
+
+        return redirect(url_for("admin.admin_subjects"))
+    
+    return render_template("admin_subjects.html", teachers = teachers, subjects = subjects)
+
+
+@bp.route("/admin/subjects/delete/<int:id>", methods = ["POST"])
+@admin_required
+def subject_delete(id):
+    subject = Subject.query.get(id)
+    if subject:
+        # Занятия по предмету и привязки преподавателей удаляются каскадом в базе
+        db.session.execute(db.delete(Subject).where(Subject.id == id))
+        mark_changed()
+        timetables.touch_all()
+        db.session.commit()
+        invalidate_dashboard_stats()
+        flash("Предмет успешно удален")
+    else:    
+        flash("Предмет не существует")
+    
+    return redirect(url_for("admin.admin_subjects"))
+
+
+@bp.route("/admin/subjects/edit/<int:id>", methods = ["POST", "GET"])
+@admin_required
+def edit_subjects(id):
+    subject = Subject.query.get(id)
+    if not subject:
+        flash("Предмет не найден", "error")
+        return redirect(url_for("admin.admin_subjects"))
+    
+    teachers = User.query.filter_by(role = "teacher").all()
+
+    if request.method == "POST":
+        name = request.form.get("name")
+        teacher_ids = request.form.getlist("teachers")
+
+        if not name:
+            flash("Название предмета не может быт пустым", "error")
+            return redirect(url_for("admin.admin_subjects"))
+
+        try:
+            subject.name = name
+            selected_teachers = User.query.filter(User.id.in_(teacher_ids)).all()
+            subject.teachers = selected_teachers
+
+            timetables.touch_all()
+            db.session.commit()
+            flash("Изменение успешно принят.", "success")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Произошло ошибка при добавление изменении {str(e)}.")
+
+        return redirect(url_for("admin.admin_subjects"))
+    
+    return render_template("edit_subjects.html", subject = subject ,teachers = teachers)
@@ -0,0 +1,187 @@
+"""
+Асинхронные чтения для read-маршрутов в режиме ASYNC_VIEWS=1 (нужен aiosqlite).
+
+URL и имена эндпоинтов те же, init_app просто подменяет view-функции.
+Сам view остаётся в потоке запроса — там проверяется пользователь сессии
+и рендерится шаблон, а в общий цикл событий (async_db.run) уходят только
+запросы к базе. Независимые чтения одной страницы идут одновременно, каждое
+в своём соединении (async_db.gather); админка и все записи остаются синхронными.
+"""
+from flask import abort, current_app, render_template, request, session
+from models import db, Group, News, Comments, User, news_likes
+from utils.async_db import async_db
+from utils.auth import login_required, get_current_user
+from utils.cache import page_cache
+from utils.pagination import keyset_paginate_async
+from utils import timetables
+from views.news import comments_json
+from views.schedule import timetable_url, check_feed_access, not_modified, feed_response
+
+
+def comments_page(db_session, news_id, per_page, after=None):
+    return keyset_paginate_async(
+        db_session, db.select(Comments).where(Comments.news_id == news_id),
+        Comments.created_at, Comments.id,
+        per_page=per_page,
+        after=after,
+    )
+
+
+async def load_feed(per_page, after, before):
+    async with async_db.session() as db_session:
+        return await keyset_paginate_async(
+            db_session, db.select(News), News.created_at, News.id,
+            per_page=per_page, after=after, before=before,
+        )
+
+
+@page_cache.cached
+def index():
+    user = get_current_user()
+    page = async_db.run(load_feed, current_app.config["NEWS_PER_PAGE"],
+                        request.args.get("after"), request.args.get("before"))
+    page_cache.tag("feed", *[f"news:{post.id}" for post in page.items])
+    return render_template("index.html", news=page.items, page=page, user=user)
+
+
+async def load_news(news_id, per_page, after, user_id=None):
+    """Новость, страница комментариев и (если передан user_id) лайкнул ли он новость"""
+    # Автор новости и комментариев подгружается join'ом (lazy="joined" в моделях)
+    calls = [
+        lambda s: s.get(News, news_id),
+        lambda s: comments_page(s, news_id, per_page, after),
+    ]
+    if user_id is not None:
+        calls.append(lambda s: s.scalar(db.select(news_likes.c.user_id)
+                                        .where(news_likes.c.news_id == news_id, news_likes.c.user_id == user_id)))
+    return await async_db.gather(*calls)
+
+
+@login_required
+def news_detail(id):
+    news_item, page, liked = async_db.run(load_news, id, current_app.config["COMMENTS_PER_PAGE"],
+                                          request.args.get("after"), session["user_id"])
+    if news_item is None:
+        abort(404)
+    return render_template(
+        "news_detail.html",
+        news=news_item,
+        comments=page.items,
+        page=page,
+        liked=liked is not None
+    )
+
+
+@login_required
+def news_comments(id):
+    news_item, page = async_db.run(load_news, id, current_app.config["COMMENTS_PER_PAGE"],
+                                   request.args.get("after"))
+    if news_item is None:
+        abort(404)
+    return comments_json(page, news_item)
+
+
+async def load_profile(user_id, group_id, timetable_key):
+    async def load_news(s):
+        result = await s.scalars(db.select(News).where(News.author_id == user_id).order_by(News.created_at.desc()))
+        return result.all()
+
+    async def load_group(s):
+        if group_id:
+            return await s.get(Group, group_id)
+        return None
+
+    async def load_timetable(s):
+        if timetable_key:
+            return await timetables.get_timetable_async(s, timetable_key)
+        return None, None
+
+    return await async_db.gather(
+        load_news,
+        lambda s: s.scalar(db.select(db.func.count()).select_from(news_likes)
+                           .where(news_likes.c.user_id == user_id)),
+        lambda s: s.scalar(db.select(db.func.count(Comments.id)).where(Comments.author_id == user_id)),
+        load_group,
+        load_timetable,
+    )
+
+
+@login_required
+def profile():
+    user = get_current_user()
+    timetable_key = None
+    if user.role == "student" and user.group_id and user.course:
+        timetable_key = timetables.group_key(user.group_id, user.course)
+    elif user.role == "teacher":
+        timetable_key = timetables.teacher_key(user.id)
+
+    group_id = user.group_id if user.role == "student" else None
+    news, likes_count, comments_count, group, (version, schedule) = async_db.run(
+        load_profile, user.id, group_id, timetable_key)
+
+    feed_url = None
+    if timetable_key:
+        feed_url = timetable_url(timetable_key, "ics", token=timetables.feed_token(timetable_key))
+
+    return render_template(
+        "profile.html",
+        user=user,
+        group=group,
+        schedule=schedule,
+        news=news,
+        likes_count=likes_count,
+        comments_count=comments_count,
+        feed_url=feed_url
+    )
+
+
+async def load_timetable(key, version):
+    async with async_db.session() as db_session:
+        return await timetables.get_timetable_async(db_session, key, version)
+
+
+def timetable_response(key, fmt, name, version):
+    check_feed_access(key)
+    etag = timetables.etag_for(key, version)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    version, entries = async_db.run(load_timetable, key, version)
+    return feed_response(entries, fmt, name, etag)
+
+
+async def load_owner(load, key):
+    """Владелец расписания (группа или преподаватель) и текущая версия расписания"""
+    return await async_db.gather(load, lambda s: timetables.current_version_async(s, key))
+
+
+def group_timetable(group_id, course, fmt):
+    key = timetables.group_key(group_id, course)
+    group, version = async_db.run(load_owner, lambda s: s.get(Group, group_id), key)
+    if group is None:
+        abort(404)
+    return timetable_response(key, fmt, f"{group.name}, {course} курс", version)
+
+
+def teacher_timetable(teacher_id, fmt):
+    key = timetables.teacher_key(teacher_id)
+    teacher, version = async_db.run(
+        load_owner, lambda s: s.scalar(db.select(User).where(User.id == teacher_id, User.role == "teacher")), key)
+    if teacher is None:
+        abort(404)
+    return timetable_response(key, fmt, teacher.username, version)
+
+
+VIEWS = {
+    "news.index": index,
+    "news.news_detail": news_detail,
+    "news.news_comments": news_comments,
+    "profile.profile": profile,
+    "schedule.group_timetable": group_timetable,
+    "schedule.teacher_timetable": teacher_timetable,
+}
+
+
+def init_app(app):
+    async_db.init_app(app, db)
+    app.view_functions.update(VIEWS)
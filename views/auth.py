@@ -0,0 +1,120 @@
+from flask import Blueprint, redirect, render_template, url_for, request, session, flash
+from models import db, Group, User
+from utils.auth import login_user
+from utils.compression import transform_options
+from utils.passwords import hash_password, verify_password, needs_rehash, PasswordHashBusy
+
+bp = Blueprint("auth", __name__)
+
+
+@bp.route("/register", methods = ["POST", "GET"])
+@transform_options(etag=False)
+def register():
+    groups = Group.query.order_by(Group.name).all()
+    if request.method == "POST":
+        username = request.form["username"]
+        email = request.form["email"]
+        password = request.form["password"]
+        role = request.form["role"]
+        status = "pending"
+
+        if not username or not email or not password or not role:
+            flash("Все поля обязательны для запольнения !")
+            return render_template("register.html", groups = groups, username = username, email = email, role = role)
+        
+        if User.query.filter_by(username = username).first():
+            flash("Это имя пользователя уже занято!")
+            return redirect(url_for("auth.register", groups = groups, username = username, email = email, role = role))
+        
+        if User.query.filter_by(email = email).first():
+            flash("Этот email уже зарегистрирован!")
+            return redirect(url_for("auth.register", groups = groups, username = username, email = email, role = role))
+
+        if len(password) >= 8:
+            try:
+                password_hash = hash_password(password)
+            except PasswordHashBusy:
+                flash("Сервер перегружен, попробуйте через минуту.")
+                return render_template("register.html", groups = groups, username = username, email = email, role = role)
+        else:
+            flash("Пароль должен быть не короче 8 символов!")
+            return render_template("register.html", groups = groups, username = username, email = email, role = role)
+        
+        
+        group_id = request.form['group_id'] if role == "student" else None
+        course = request.form['course'] if role == "student" else None
+        user = User(username = username, email = email, password_hash = password_hash, role = role, group_id = group_id, course = course, status = status)
+        
+        try:
+            db.session.add(user)
+            db.session.commit()
+            flash("Запрос на регистрции успешно отправлен.")
+            return redirect(url_for("news.index"))
+        except Exception as e:
+            flash(f"Ошибка при регистрации: {str(e)}.")
+            return render_template("register.html", groups = groups, username = username, email = email, role = role)
+    
+    return render_template("register.html", groups = groups)
+
+
+@bp.route("/login", methods=["POST", "GET"])
+@transform_options(etag=False)
+def login():
+    if request.method == "POST":
+        email = request.form.get("email")
+        password = request.form.get("password")
+        form_role = request.form.get("role")
+
+        user = User.query.filter_by(email=email).first()
+
+        # 1. Проверка существования пользователя
+        if not user:
+            flash("Пользователь не найден.", "error")
+            return redirect(url_for("auth.login"))
+
+        # 2. Проверка роли
+        if user.role != form_role:
+            flash("Вы выбрали неправильную роль.", "error")
+            return redirect(url_for("auth.login"))
+
+        # 3. Проверка статуса
+        if user.status == "pending":
+            flash("Ваш запрос ещё не одобрен. Подождите подтверждения.", "warning")
+            return redirect(url_for("auth.login"))
+        elif user.status == "rejected":
+            flash("Ваш запрос был отклонён. Попробуйте зарегистрироваться снова.", "error")
+            return redirect(url_for("auth.register"))
+
+        # 4. Проверка пароля (в ограниченном пуле, чтобы не занимать все воркеры)
+        try:
+            if not verify_password(user.password_hash, password):
+                flash("Неверный пароль!", "error")
+                return redirect(url_for("auth.login"))
+
+            # Хэш со старой политикой тихо пересчитываем, пока пароль известен
+            if needs_rehash(user.password_hash):
+                user.password_hash = hash_password(password)
+                db.session.commit()
+        except PasswordHashBusy:
+            flash("Сервер перегружен, попробуйте войти через минуту.", "warning")
+            return redirect(url_for("auth.login"))
+
+        # 5. Авторизация успешна → сохраняем данные в сессии
+        login_user(user)
+        flash("Добро пожаловать!", "success")
+
+        # === 6. Разное перенаправление в зависимости от роли ===
+        if user.role == "admin":
+            return redirect(url_for("admin.admin"))  # твой маршрут для админ-панели
+        else:
+            return redirect(url_for("profile.profile"))  # обычная главная страница
+
+    # Если GET-запрос → показываем страницу логина
+    return render_template("login.html")
+
+
+@bp.route("/logout")
+def logout():
+    session.clear()
+    flash("Выход успешно выполнен !")
+    return redirect(url_for("auth.login"))
@@ -0,0 +1,384 @@
+from flask import Blueprint, current_app, redirect, render_template, url_for, request, session, flash, jsonify, abort
+from functools import wraps
+from sqlalchemy.orm import joinedload
+from models import db, News, Comments, news_likes, set_like
+from utils.auth import login_required, get_current_user
+from utils.pagination import keyset_paginate
+from utils.cache import page_cache
+from utils.events import broker
+from utils import search
+
+bp = Blueprint("news", __name__)
+
+
+@bp.route("/")
+@page_cache.cached
+def index():
+    user = get_current_user()
+    page = keyset_paginate(
+        News.query.options(joinedload(News.author)), News.created_at, News.id,
+        per_page=current_app.config["NEWS_PER_PAGE"],
+        after=request.args.get("after"),
+        before=request.args.get("before"),
+    )
+    page_cache.tag("feed", *[f"news:{post.id}" for post in page.items])
+    return render_template("index.html", news=page.items, page=page, user=user)
+
+
+@bp.route("/news/add", methods = ["POST", "GET"])
+@login_required
+def add_news():
+    if request.method == "POST":
+        title = request.form.get("title")
+        content = request.form.get("content")
+
+        if not title or not content:
+            flash("Все поля обязательны для заполнение.")
+            return redirect(url_for("news.add_news"))
+        
+        news = News(title = title, content = content, author_id = session["user_id"])
+        try:
+            db.session.add(news)
+            db.session.flush()
+            search.index_news(news)
+            db.session.commit()
+            page_cache.invalidate("feed")
+            flash("Пост успешно добавлен.", "success")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Произошла ошибка при добавлении {str(e)}")
+        
+        return redirect(url_for("news.news_detail", id = news.id))
+    
+    return render_template("add_news.html")
+
+
+def news_counts(news_id):
+    return dict(db.session.execute(
+        db.select(News.like_count, News.comment_count).where(News.id == news_id)
+    ).one()._mapping)
+
+
+def publish_counts(news_id):
+    """
+    Свежие счётчики — открытым страницам новости (пачка лайков схлопывается
+    в одно событие); они же возвращаются для ответа JSON API
+    """
+    counts = news_counts(news_id)
+    broker.publish(f"news:{news_id}", "counts", counts, key="counts")
+    return counts
+
+
+def save_comment(news_id, content):
+    """Добавляет комментарий и сдвигает comment_count; commit — за вызывающим"""
+    author = get_current_user()
+    comment = Comments(content=content, author=author, news_id=news_id)
+    db.session.add(comment)
+    db.session.flush()
+    search.index_comment(comment)
+    # Данные для живого обновления собираются до commit, пока объекты не истекли
+    event = {
+        "id": comment.id,
+        "content": comment.content,
+        "created_at": comment.created_at.isoformat(),
+        "author": {"id": author.id, "username": author.username, "role": author.role},
+    }
+    News.query.filter_by(id = news_id).update(
+        {News.comment_count: News.comment_count + 1}, synchronize_session = False
+    )
+    return comment, event
+
+
+def can_delete_comment(user, comment):
+    return (user.role == "admin"
+            or user.id == comment.author_id
+            or user.id == comment.news.author_id)
+
+
+def remove_comment(comment):
+    """Удаляет комментарий и сдвигает comment_count; commit — за вызывающим"""
+    search.remove_comments([comment.id])
+    db.session.delete(comment)
+    News.query.filter_by(id = comment.news_id).update(
+        {News.comment_count: News.comment_count - 1}, synchronize_session = False
+    )
+
+
+@bp.route("/news/like/<int:id>", methods=["POST"])
+@login_required
+def like_news(id):
+    """Лайк без JS — форма на странице новости; GET не меняет данные (префетч, краулеры)"""
+    News.query.get_or_404(id)
+    user_id = session["user_id"]
+
+    # Одна проверка по первичному ключу news_likes вместо загрузки всех лайкнувших
+    liked = db.session.execute(
+        db.select(news_likes.c.user_id)
+        .where(news_likes.c.news_id == id, news_likes.c.user_id == user_id)
+    ).first()
+
+    try:
+        set_like(id, user_id, not liked)
+        db.session.commit()
+        page_cache.invalidate(f"news:{id}")
+        publish_counts(id)
+        flash("Лайк снят!" if liked else "Лайк поставлен!", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Ошибка при обновлении лайка: {str(e)}", "error")
+
+    return redirect(url_for("news.news_detail", id = id))
+
+
+@bp.route("/news/comment/<int:id>", methods=["POST"])
+@login_required
+def comment_news(id):
+    news_item = News.query.get_or_404(id)
+    content = request.form.get("content")
+
+    if not content:
+        flash("Комментарий не может быть пустым!", "error")
+        return redirect(url_for("news.news_detail", id = id))
+
+    _, event = save_comment(id, content)
+    db.session.commit()
+    page_cache.invalidate(f"news:{id}")
+    broker.publish(f"news:{id}", "comment", event)
+    publish_counts(id)
+    flash("Комментарий добавлен!", "success")
+    return redirect(url_for("news.news_detail", id = id))
+
+
+@bp.route("/news/search")
+@login_required
+def search_news():
+    query = request.args.get("q", "").strip()
+    page = search.search(query, current_app.config["SEARCH_PER_PAGE"], after=request.args.get("after"))
+    return render_template("news_search.html", query=query, hits=page.items, page=page)
+
+
+def comments_page(news_id, after=None):
+    """Страница комментариев новости: новые первыми, keyset по (created_at, id)"""
+    return keyset_paginate(
+        Comments.query.options(joinedload(Comments.author)).filter_by(news_id=news_id),
+        Comments.created_at, Comments.id,
+        per_page=current_app.config["COMMENTS_PER_PAGE"],
+        after=after,
+    )
+
+
+@bp.route("/news/<int:id>")
+@login_required
+def news_detail(id):
+    # Получаем новость по ID
+    news_item = News.query.options(joinedload(News.author)).filter_by(id=id).first_or_404()
+
+    # Одна страница комментариев — стоимость не зависит от их общего числа
+    page = comments_page(id, after=request.args.get("after"))
+
+    # Лайкнул ли текущий пользователь — проверка по первичному ключу news_likes
+    liked = db.session.execute(
+        db.select(news_likes.c.user_id)
+        .where(news_likes.c.news_id == id, news_likes.c.user_id == session["user_id"])
+    ).first() is not None
+
+    return render_template(
+        "news_detail.html",
+        news=news_item,
+        comments=page.items,
+        page=page,
+        liked=liked
+    )
+
+
+@bp.route("/news/<int:id>/comments")
+@login_required
+def news_comments(id):
+    """Следующие страницы комментариев для подгрузки на странице новости"""
+    news_item = News.query.get_or_404(id)
+    page = comments_page(id, after=request.args.get("after"))
+    return comments_json(page, news_item)
+
+
+@bp.route("/news/<int:id>/events")
+@login_required
+def news_events(id):
+    """Лайки и комментарии новости в реальном времени (Server-Sent Events)"""
+    News.query.get_or_404(id)
+    return broker.stream(f"news:{id}")
+
+
+def json_required(f):
+    """
+    JSON API принимает только application/json: такой запрос с чужого сайта
+    браузер без CORS не отправит, в отличие от обычной формы
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not request.is_json:
+            return jsonify(error="нужен Content-Type: application/json"), 415
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def news_exists(news_id):
+    if db.session.scalar(db.select(News.id).where(News.id == news_id)) is None:
+        abort(404)
+
+
+def like_response(news_id, liked, changed):
+    db.session.commit()
+    if changed:
+        page_cache.invalidate(f"news:{news_id}")
+        counts = publish_counts(news_id)
+    else:
+        counts = news_counts(news_id)
+    return jsonify(liked=liked, changed=changed, **counts)
+
+
+@bp.route("/api/news/<int:id>/like", methods=["POST"])
+@login_required
+@json_required
+def api_like_news(id):
+    """Лайк без перезагрузки; повторный запрос ничего не меняет (changed: false)"""
+    news_exists(id)
+    changed = set_like(id, session["user_id"], True)
+    return like_response(id, True, changed)
+
+
+@bp.route("/api/news/<int:id>/unlike", methods=["POST"])
+@login_required
+@json_required
+def api_unlike_news(id):
+    news_exists(id)
+    changed = set_like(id, session["user_id"], False)
+    return like_response(id, False, changed)
+
+
+@bp.route("/api/news/<int:id>/comments", methods=["POST"])
+@login_required
+@json_required
+def api_add_comment(id):
+    """{"content": "..."} → готовый фрагмент комментария и новые счётчики"""
+    news_item = News.query.get_or_404(id)
+    content = (request.get_json(silent=True) or {}).get("content")
+    if not isinstance(content, str) or not content.strip():
+        return jsonify(error="Комментарий не может быть пустым!"), 400
+
+    comment, event = save_comment(id, content)
+    # Фрагмент рендерится до commit — после него объекты истекли бы и перечитывались
+    html = render_template("_comment.html", comment=comment, news=news_item)
+    db.session.commit()
+    page_cache.invalidate(f"news:{id}")
+    broker.publish(f"news:{id}", "comment", event)
+    counts = publish_counts(id)
+    return jsonify(comment=dict(event, html=html), **counts), 201
+
+
+@bp.route("/api/comments/<int:id>/delete", methods=["POST"])
+@login_required
+@json_required
+def api_delete_comment(id):
+    comment = Comments.query.get_or_404(id)
+    if not can_delete_comment(get_current_user(), comment):
+        return jsonify(error="У вас нет прав на удаление этого комментария!"), 403
+    news_id = comment.news_id
+    remove_comment(comment)
+    db.session.commit()
+    page_cache.invalidate(f"news:{news_id}")
+    broker.publish(f"news:{news_id}", "comment_deleted", {"id": id})
+    counts = publish_counts(news_id)
+    return jsonify(deleted=id, **counts)
+
+
+def comments_json(page, news_item):
+    return jsonify(
+        comments=[
+            {
+                "id": comment.id,
+                "content": comment.content,
+                "created_at": comment.created_at.isoformat(),
+                "author": {
+                    "id": comment.author.id,
+                    "username": comment.author.username,
+                    "role": comment.author.role,
+                },
+                "html": render_template("_comment.html", comment=comment, news=news_item),
+            }
+            for comment in page.items
+        ],
+        next_cursor=page.next_cursor,
+        # Счётчики — для страниц, которые опрашивают сервер вместо SSE
+        like_count=news_item.like_count,
+        comment_count=news_item.comment_count,
+    )
+
+
+@bp.route("/news/edit/<int:id>", methods = ["POST", "GET"])
+@login_required
+def edit_news(id):
+    news_item = News.query.get_or_404(id)
+    current_user = get_current_user()
+    if current_user.id != news_item.author_id and current_user.role != "admin":
+        flash("У вас нет прав на редактирование этого поста!", "error")
+        return redirect(url_for("news.index"))
+    if request.method == "POST":
+        title = request.form.get("title")
+        content = request.form.get("content")
+        if not title or not content:
+            flash("Все поля обязательны для заполнения!", "error")
+            return render_template("edit_news.html", id = id)
+        news_item.title = title
+        news_item.content = content
+        try:
+            search.index_news(news_item)
+            db.session.commit()
+            page_cache.invalidate(f"news:{id}")
+            flash("Пост успешно обновлён!", "success")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Ошибка при обновлении поста: {str(e)}.", "error")
+        return redirect(url_for("news.news_detail", id = id))
+    return render_template("edit_news.html", news = news_item)
+
+
+@bp.route("/news/delete/<int:id>", methods=["POST"])
+@login_required
+def delete_news(id):
+    news_item = News.query.get_or_404(id)
+    current_user = get_current_user()
+    if current_user.id != news_item.author_id and current_user.role != "admin":
+        flash("У вас нет прав на редактирование этого поста!", "error")
+        return redirect(url_for("news.news_detail", id = id))
+    try:
+        search.remove_news([news_item.id])
+        db.session.delete(news_item)
+        db.session.commit()
+        page_cache.invalidate("feed")
+        flash("Пост успешно удален!", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Произошла ошибка при удалении {str(e)}.", "error")
+
+    return redirect(url_for("news.index"))
+
+
+@bp.route("/comment/delete/<int:id>", methods=["POST"])
+@login_required
+def delete_comment(id):
+    comment = Comments.query.get_or_404(id)
+    current_user = get_current_user()
+    if not can_delete_comment(current_user, comment):
+        flash("У вас нет прав на удаление этого комментария!", "error")
+        return redirect(url_for("news.news_detail", id = comment.news_id))
+    try:
+        remove_comment(comment)
+        db.session.commit()
+        page_cache.invalidate(f"news:{comment.news_id}")
+        broker.publish(f"news:{comment.news_id}", "comment_deleted", {"id": comment.id})
+        publish_counts(comment.news_id)
+        flash("Комментарий успешно удалён!", "success")
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Произошла ошибка при удалении комментария: {str(e)}.")
+    return redirect(url_for("news.news_detail", id = comment.news_id))
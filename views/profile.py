@@ -0,0 +1,227 @@
+import os
+from flask import Blueprint, current_app, redirect, render_template, url_for, request, session, flash
+from models import db, Group, User, News, Comments, news_likes
+from utils.auth import login_required, get_current_user
+from utils.cache import page_cache
+from utils.schedule_conflicts import mark_changed
+from utils.passwords import verify_password, PasswordHashBusy
+from utils.images import AVATAR_DIR, save_upload, verify_image, process_avatar, remove_avatar
+from utils import search, timetables
+from views.schedule import timetable_url
+
+bp = Blueprint("profile", __name__)
+
+
+ALLOWED_EXTENSIONS = {"png", "jpg", "jpeg", "gif"}
+
+
+def allowed_file(filename):
+    return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
+
+
+@bp.route("/profile")
+@login_required
+def profile():
+    user = get_current_user()
+    group = None
+    schedule = None
+
+    # Получаем все посты пользователя
+    news = News.query.filter_by(author_id=user.id).order_by(News.created_at.desc()).all()
+    likes_count = db.session.scalar(
+        db.select(db.func.count()).select_from(news_likes).where(news_likes.c.user_id == user.id)
+    )
+    comments_count = Comments.query.filter_by(author_id=user.id).count()
+
+    # Расписание берётся из готовой копии и пересобирается только после изменений
+    timetable_key = None
+    if user.role == "student":
+        # После удаления группы у студента group_id = NULL
+        if user.group_id:
+            group = db.session.get(Group, user.group_id)
+        if user.group_id and user.course:
+            timetable_key = timetables.group_key(user.group_id, user.course)
+    elif user.role == "teacher":
+        timetable_key = timetables.teacher_key(user.id)
+
+    feed_url = None
+    if timetable_key:
+        version, schedule = timetables.get_timetable(timetable_key)
+        feed_url = timetable_url(timetable_key, "ics", token=timetables.feed_token(timetable_key))
+
+    # Для админа можно показать все расписания или ничего — решим позже
+    return render_template(
+        "profile.html",
+        user=user,
+        group=group,
+        schedule=schedule,
+        news=news,
+        likes_count=likes_count,
+        comments_count=comments_count,
+        feed_url=feed_url
+    )
+
+
+@bp.route("/profile/photo", methods=["POST"])
+@login_required
+def upload_or_edit_photo():
+    """Загрузка нового фото профиля или редактирование существующего"""
+    if "photo" not in request.files:
+        flash("Файл не выбран!", "error")
+        return redirect(url_for("profile.profile"))
+
+    file = request.files["photo"]
+    if file.filename == "":
+        flash("Файл не выбран!", "error")
+        return redirect(url_for("profile.profile"))
+
+    if not allowed_file(file.filename):
+        flash("Неверный формат файла! Допустимо: png, jpg, jpeg, gif.", "error")
+        return redirect(url_for("profile.profile"))
+
+    user = get_current_user()
+
+    # Файл пишется на диск потоком и проверяется сразу; ресайз в варианты идёт в фоне
+    tmp_path, digest = save_upload(file, current_app.config["UPLOAD_FOLDER"])
+    if not verify_image(tmp_path):
+        os.remove(tmp_path)
+        flash("Файл не является изображением!", "error")
+        return redirect(url_for("profile.profile"))
+
+    new_image = f"{AVATAR_DIR}/{digest}"
+    if new_image == user.profile_image:
+        os.remove(tmp_path)
+        flash("Это фото уже установлено.", "info")
+        return redirect(url_for("profile.profile"))
+
+    # profile_image меняется, только когда варианты уже на диске: до этого
+    # профиль показывает прежнее фото, а не ссылки на несуществующие файлы
+    app = current_app._get_current_object()
+    user_id = user.id
+    process_avatar(tmp_path, digest, app.config["UPLOAD_FOLDER"],
+                   on_done=lambda: set_photo(app, user_id, new_image))
+    flash("Фото профиля загружено и появится через несколько секунд.", "success")
+
+    return redirect(url_for("profile.profile"))
+
+
+def set_photo(app, user_id, new_image):
+    """Ставит готовое фото в фоновом потоке (своя сессия) и удаляет файлы прежнего"""
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        if user is None or user.profile_image == new_image:
+            return
+        old_image = user.profile_image
+        user.profile_image = new_image
+        db.session.commit()
+        release_photo(old_image, user_id)
+
+
+def release_photo(image, user_id):
+    """Удаляет файлы фото пользователя user_id, если оно больше ни у кого не используется"""
+    if not image:
+        return
+    shared = User.query.filter(User.profile_image == image, User.id != user_id).first()
+    if not shared:
+        remove_avatar(image, current_app.config["UPLOAD_FOLDER"])
+
+
+@bp.route("/profile/photo/delete")
+@login_required
+def delete_photo():
+    """Удаление фото профиля"""
+    user = get_current_user()
+    if user.profile_image:
+        try:
+            # Файлы удаляются только после commit: при откате профиль не останется со ссылкой в никуда
+            old_image = user.profile_image
+            user.profile_image = None
+            db.session.commit()
+            release_photo(old_image, user.id)
+            flash("Фото профиля удалено!", "success")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Ошибка при удалении фото: {str(e)}", "error")
+    else:
+        flash("Фото профиля отсутствует.", "info")
+
+    return redirect(url_for("profile.profile"))
+
+
+@bp.after_app_request
+def cache_avatars_forever(response):
+    # Имена вариантов содержат хэш содержимого — файл по такому адресу никогда не меняется
+    if request.path.startswith(f"/static/uploads/{AVATAR_DIR}/") and response.status_code == 200:
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
+
+@bp.route("/profile/delete/confirm")
+@login_required
+def confirm_delete_profile():
+    user = get_current_user()
+    return render_template("delete_profile.html", user=user)
+
+
+@bp.route("/profile/delete", methods = ["POST"])
+@login_required
+def delete_profile():
+    current_user = get_current_user()
+    password = request.form.get("password")
+
+    if not password:
+        flash("Введите пароль !", "error")
+        return redirect(url_for("profile.profile"))
+
+    try:
+        password_ok = verify_password(current_user.password_hash, password)
+    except PasswordHashBusy:
+        flash("Сервер перегружен, попробуйте через минуту.", "warning")
+        return redirect(url_for("profile.confirm_delete_profile"))
+
+    if not password_ok:
+        flash("Неверный пароль", "error") 
+        return redirect(url_for("profile.confirm_delete_profile"))
+    
+    try:
+        user_id = current_user.id
+        # Лайки и комментарии пользователя под чужими постами удаляются вместе с ним —
+        # поправляем счётчики этих постов до удаления
+        liked_ids = db.select(news_likes.c.news_id).where(news_likes.c.user_id == user_id)
+        News.query.filter(News.id.in_(liked_ids)).update(
+            {News.like_count: News.like_count - 1}, synchronize_session = False
+        )
+        own_comments = (
+            db.select(db.func.count(Comments.id))
+            .where(Comments.news_id == News.id, Comments.author_id == user_id)
+            .scalar_subquery()
+        )
+        commented_ids = db.select(Comments.news_id).where(Comments.author_id == user_id)
+        # После удаления лайков и комментариев уже не узнать, чьи счётчики изменились
+        touched_ids = set(db.session.scalars(liked_ids.union(commented_ids)))
+        News.query.filter(News.id.in_(commented_ids), News.author_id != user_id).update(
+            {News.comment_count: News.comment_count - own_comments}, synchronize_session = False
+        )
+        search.remove_news(db.select(News.id).where(News.author_id == user_id))
+        search.remove_comments(db.select(Comments.id).where(Comments.author_id == user_id))
+        old_image = current_user.profile_image
+
+        # Посты, их комментарии и лайки, комментарии и лайки пользователя, привязки
+        # к предметам — ON DELETE CASCADE; в расписании преподаватель обнуляется
+        db.session.execute(db.delete(User).where(User.id == user_id))
+        if current_user.role == "teacher":
+            mark_changed()
+            timetables.touch_all()
+        db.session.commit()
+        # Файлы фото — только после commit, как и при замене фото
+        release_photo(old_image, user_id)
+        page_cache.invalidate("feed", *[f"news:{news_id}" for news_id in touched_ids])
+        session.clear()
+
+        flash("Профиль и связанные данные успешно удалены!","success")
+        return redirect(url_for("auth.register"))
+    
+    except Exception as e:
+        db.session.rollback()
+        flash(f"Ошибка при удалении профиля: {str(e)}", "error")
+        return redirect(url_for("profile.profile"))
@@ -0,0 +1,276 @@
+from datetime import datetime
+from flask import Blueprint, current_app, redirect, render_template, url_for, request, session, flash, abort, jsonify, Response
+from sqlalchemy.orm import joinedload
+from models import db, Group, Subject, User, Schedule
+from utils.auth import admin_required
+from utils.schedule_conflicts import Slot, find_conflicts, mark_changed, apply_changes, slot_from_schedule
+from utils.schedule_import import parse_file, import_schedule
+from utils import timetables
+
+bp = Blueprint("schedule", __name__)
+
+
+def timetable_url(key, fmt, **kwargs):
+    kind, *ids = key.split(":")
+    if kind == "group":
+        return url_for("schedule.group_timetable", group_id=ids[0], course=ids[1], fmt=fmt, _external=True, **kwargs)
+    return url_for("schedule.teacher_timetable", teacher_id=ids[0], fmt=fmt, _external=True, **kwargs)
+
+
+def check_feed_access(key):
+    # Календари ходят без сессии — для них ссылка подписывается токеном
+    if "user_id" not in session and not timetables.check_feed_token(key, request.args.get("token", "")):
+        abort(403)
+
+
+def not_modified(etag):
+    # Слабое сравнение: после сжатия ETag приходит от клиента как W/"..."
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def feed_response(entries, fmt, name, etag):
+    if fmt == "ics":
+        semester_start = timetables.parse_semester_start(current_app.config["SEMESTER_START"])
+        response = Response(timetables.to_ics(entries, name, semester_start), mimetype="text/calendar")
+    else:
+        response = jsonify([
+            dict(
+                id=entry.id,
+                weekday=entry.weekday,
+                start=entry.start_time.strftime("%H:%M"),
+                end=entry.end_time.strftime("%H:%M"),
+                subject=entry.subject_name,
+                teacher=entry.teacher_name,
+                group=entry.group_name,
+                course=entry.course,
+            )
+            for entry in entries
+        ])
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def timetable_response(key, fmt, name):
+    check_feed_access(key)
+    version = timetables.current_version(key)
+    etag = timetables.etag_for(key, version)
+    response = not_modified(etag)
+    if response is not None:
+        return response
+    version, entries = timetables.get_timetable(key, version)
+    return feed_response(entries, fmt, name, etag)
+
+
+@bp.route("/timetable/group/<int:group_id>/<int:course>.<any(json, ics):fmt>")
+def group_timetable(group_id, course, fmt):
+    group = Group.query.get_or_404(group_id)
+    return timetable_response(timetables.group_key(group_id, course), fmt, f"{group.name}, {course} курс")
+
+
+@bp.route("/timetable/teacher/<int:teacher_id>.<any(json, ics):fmt>")
+def teacher_timetable(teacher_id, fmt):
+    teacher = User.query.filter_by(id=teacher_id, role="teacher").first_or_404()
+    return timetable_response(timetables.teacher_key(teacher_id), fmt, teacher.username)
+
+
+def flash_schedule_conflicts(conflicts):
+    """Сообщает обо всех конфликтующих парах, а не только о первой"""
+    ids = {c.schedule_id for c in conflicts if c.schedule_id is not None}
+    rows = {s.id: s for s in Schedule.query.filter(Schedule.id.in_(ids)).all()} if ids else {}
+    for conflict in conflicts:
+        row = rows.get(conflict.schedule_id)
+        details = ""
+        if row:
+            details = (f" ({row.subject.name}, {row.start_time.strftime('%H:%M')}"
+                       f"-{row.end_time.strftime('%H:%M')})")
+        if conflict.kind == "group":
+            flash(f"Конфликт у этой группы/курса уже есть пара в это время{details}.", "error")
+        else:
+            flash(f"Конфликт: у преподователя уже есть пара в это время{details}.", "error")
+
+
+@bp.route("/admin/schedule", methods = ["POST", "GET"])
+@admin_required
+def admin_schedule():
+    if request.method == "POST":
+        try:
+            group_id = int(request.form.get("group_id"))
+            course = int(request.form.get("course"))
+            subject_id = int(request.form.get("subject_id"))
+            teacher_id = int(request.form.get("teacher_id"))
+            weekday = int(request.form.get("weekday"))
+
+            if course not in (1, 2, 3, 4):
+                flash("Курс должен быть 1, 2, 3 или 4.", "error")
+                return redirect(url_for("schedule.admin_schedule"))
+
+            start_time = datetime.strptime(request.form.get("start_time"), "%H:%M").time()
+            end_time = datetime.strptime(request.form.get("end_time"), "%H:%M").time()
+            
+            if start_time >= end_time:
+                flash("Время начала должно быть раньше времени окончания.", "error")
+                return redirect(url_for("schedule.admin_schedule"))
+            
+            slot = Slot(group_id, course, teacher_id, weekday, start_time, end_time)
+            conflicts = find_conflicts([slot]).get(0)
+            if conflicts:
+                flash_schedule_conflicts(conflicts)
+                return redirect(url_for("schedule.admin_schedule"))
+            
+            schedule = Schedule(
+                group_id = group_id,
+                subject_id = subject_id,
+                teacher_id = teacher_id,
+                course = course,
+                weekday = weekday,
+                start_time = start_time,
+                end_time = end_time
+            )
+            db.session.add(schedule)
+            timetables.touch(*timetables.keys_for(slot))
+            version = mark_changed()
+            slot = slot._replace(id = schedule.id)
+            db.session.commit()
+            apply_changes(version, added=[slot])
+            flash("Расписание успешно добавлено !", "success")
+        
+        except ValueError:
+            db.session.rollback()
+            flash("Некорректные данные формы (числовые поля или формат времени).", "error")
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Ошибка при добавлениии расписания: {str(e)}", "error")
+
+        return redirect(url_for("schedule.admin_schedule"))
+
+    groups = Group.query.all()
+    subjects = Subject.query.all()
+    teachers = User.query.filter_by(role = "teacher").all()
+    schedules = (
+        Schedule.query
+        .options(joinedload(Schedule.group), joinedload(Schedule.subject), joinedload(Schedule.teacher))
+        .order_by(Schedule.weekday, Schedule.start_time)
+        .all()
+    )
+
+    return render_template(
+        "admin_schedule.html",
+        groups = groups,
+        subjects = subjects,
+        teachers = teachers,
+        schedules = schedules
+    )
+
+
+@bp.route("/admin/schedule/import", methods = ["POST"])
+@admin_required
+def import_schedule_file():
+    """Массовая загрузка расписания из CSV/JSON"""
+    file = request.files.get("file")
+    if not file or file.filename == "":
+        flash("Файл не выбран!", "error")
+        return redirect(url_for("schedule.admin_schedule"))
+
+    try:
+        rows = parse_file(file.stream, file.filename)
+        inserted, errors = import_schedule(rows)
+    except (ValueError, UnicodeDecodeError) as e:
+        flash(f"Не удалось прочитать файл: {str(e)}", "error")
+        return redirect(url_for("schedule.admin_schedule"))
+    except Exception as e:
+        flash(f"Ошибка при импорте расписания: {str(e)}", "error")
+        return redirect(url_for("schedule.admin_schedule"))
+
+    if errors:
+        flash(f"Импорт отменён: ошибок — {len(errors)}.", "error")
+        for line, message in errors[:20]:
+            flash(f"Строка {line}: {message}", "error")
+        if len(errors) > 20:
+            flash(f"…и ещё {len(errors) - 20} ошибок.", "error")
+    elif inserted:
+        flash(f"Импортировано занятий: {inserted}.", "success")
+    else:
+        flash("Файл не содержит занятий.", "warning")
+    return redirect(url_for("schedule.admin_schedule"))
+
+
+@bp.route("/admin/schedule/delete/<id>")
+@admin_required
+def delete_schedule(id):
+    schedule = Schedule.query.get(id)
+    if schedule:
+        db.session.delete(schedule)
+        timetables.touch(*timetables.keys_for(slot_from_schedule(schedule)))
+        version = mark_changed()
+        db.session.commit()
+        apply_changes(version, removed=[schedule.id])
+        flash("Пара удалена!")
+    else:
+        flash("Ошибка. Повторите попытку заново!")
+    
+    return redirect(url_for("schedule.admin_schedule"))
+
+
+@bp.route("/admin/edit_schedule/<int:id>", methods=["GET", "POST"])
+@admin_required
+def edit_schedule(id):
+    schedule = Schedule.query.get_or_404(id)  # <-- ищем по id или 404 если нет
+    
+    groups = Group.query.all()
+    subjects = Subject.query.all()
+    teachers = User.query.filter_by(role="teacher").all()
+
+    if request.method == "POST":
+        try:
+            group_id = int(request.form.get("group_id"))
+            course = int(request.form.get("course"))
+            subject_id = int(request.form.get("subject_id"))
+            teacher_id = int(request.form.get("teacher_id"))
+            weekday = int(request.form.get("weekday"))
+
+            start_time = datetime.strptime(request.form.get("start_time"), "%H:%M").time()
+            end_time = datetime.strptime(request.form.get("end_time"), "%H:%M").time()
+
+            if start_time >= end_time:
+                flash("Время начала должно быть раньше времени окончания.", "error")
+                return redirect(url_for("schedule.edit_schedule", id=id))
+
+            slot = Slot(group_id, course, teacher_id, weekday, start_time, end_time, id)
+            conflicts = find_conflicts([slot]).get(0)
+            if conflicts:
+                flash_schedule_conflicts(conflicts)
+                return redirect(url_for("schedule.edit_schedule", id=id))
+
+            old_slot = slot_from_schedule(schedule)
+            schedule.group_id = group_id
+            schedule.course = course
+            schedule.subject_id = subject_id
+            schedule.teacher_id = teacher_id
+            schedule.weekday = weekday
+            schedule.start_time = start_time
+            schedule.end_time = end_time
+
+            timetables.touch(*timetables.keys_for(old_slot), *timetables.keys_for(slot))
+            version = mark_changed()
+            db.session.commit()
+            apply_changes(version, added=[slot], removed=[id])
+            flash("Расписание успешно обновлено!", "success")
+            return redirect(url_for("schedule.admin_schedule"))
+
+        except Exception as e:
+            db.session.rollback()
+            flash(f"Ошибка при обновлении расписания: {str(e)}", "error")
+            return redirect(url_for("schedule.edit_schedule", id=id))
+
+    return render_template(
+        "edit_schedule.html",
+        schedule=schedule,
+        groups=groups,
+        subjects=subjects,
+        teachers=teachers
+    )
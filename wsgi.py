@@ -0,0 +1,11 @@
+"""
+Точка входа для WSGI-сервера с предварительным форком:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Приложение собирается один раз в мастере (preload_app), воркеры получают
+его через fork уже готовым и делят с мастером память, пока её не меняют.
+"""
+from app import create_app
+
+app = create_app()